@@ -5,6 +5,7 @@ import os
 
 import unittest
 
+import numpy as np
 import pytest
 
 import vvhgvs.dataproviders.uta
@@ -328,6 +329,86 @@ class Test_AlignmentMapper(unittest.TestCase):
             self.assertEqual(tm.c_to_g(test_case["c"]), test_case["g"])
 
 
+@pytest.mark.quick
+class Test_AlignmentMapper_map(unittest.TestCase):
+    def setUp(self):
+        self.am = AlignmentMapper.__new__(AlignmentMapper)
+        # exon; intron; exon with 2 transcript-only (D) and 1 genome-only (I) bases; intron; exon
+        self.am.ref_pos, self.am.tgt_pos, self.am.cigar_op = self.am._parse_cigar("10=20N5=2D3=1I4=30N6=")
+
+    def test_map_g_to_n(self):
+        am = self.am
+        g_to_n = lambda pos, base="start": am._map(am.ref_pos, am.tgt_pos, pos, base)
+        self.assertEqual((0, 0, "="), g_to_n(0))
+        self.assertEqual((9, 0, "="), g_to_n(9))
+        self.assertEqual((9, 1, "N"), g_to_n(10))
+        self.assertEqual((10, -1, "N"), g_to_n(29))
+        self.assertEqual((14, 0, "="), g_to_n(34))
+        self.assertEqual((17, 0, "="), g_to_n(35))
+        self.assertEqual((19, 0, "I"), g_to_n(38, "start"))
+        self.assertEqual((20, 0, "I"), g_to_n(38, "end"))
+        self.assertEqual((23, 1, "N"), g_to_n(43))
+        self.assertEqual((29, 0, "="), g_to_n(78))
+        for pos in (-1, 79):
+            with self.assertRaises(HGVSInvalidIntervalError):
+                g_to_n(pos)
+
+    def test_map_n_to_g(self):
+        am = self.am
+        n_to_g = lambda pos, base="start": am._map(am.tgt_pos, am.ref_pos, pos, base)
+        self.assertEqual((9, 0, "="), n_to_g(9))
+        self.assertEqual((30, 0, "="), n_to_g(10))
+        self.assertEqual((34, 0, "D"), n_to_g(15, "start"))
+        self.assertEqual((35, 0, "D"), n_to_g(16, "end"))
+        self.assertEqual((39, 0, "="), n_to_g(20))
+        self.assertEqual((78, 0, "="), n_to_g(29))
+        with self.assertRaises(HGVSInvalidIntervalError):
+            n_to_g(30)
+
+
+class _AlignmentDataProvider(object):
+    def __init__(self, strand):
+        self.strand = strand
+
+    def get_tx_info(self, tx_ac, alt_ac, alt_aln_method):
+        return {"hgnc": "TEST"}
+
+    def get_agg_exon_aln(self, tx_ac, alt_ac, alt_aln_method):
+        return {"alt_strand": self.strand, "mapped_start": 1000, "cds_start_i": 5, "cds_end_i": 25,
+                "not_quite_cigar": "10=20N5=2D3=1I4=30N6="}
+
+
+@pytest.mark.quick
+class Test_AlignmentMapper_array(unittest.TestCase):
+    def test_arrays_match_intervals(self):
+        for strand in (1, -1):
+            am = AlignmentMapper(_AlignmentDataProvider(strand), "NM_TEST.1", "NC_TEST.1", "splign")
+            g_pos = np.arange(1001, 1080)
+            for base in ("start", "end"):
+                c_base, c_offset, c_datum = am.g_to_c_array(g_pos, base)
+                n_base, n_offset = am.g_to_n_array(g_pos, base)
+                g_back = am.n_to_g_array(n_base, n_offset, base)
+                for i, g in enumerate(g_pos):
+                    g_iv = vvhgvs.location.Interval(start=vvhgvs.location.SimplePosition(int(g)),
+                                                    end=vvhgvs.location.SimplePosition(int(g)))
+                    c = getattr(am.g_to_c(g_iv), base)
+                    self.assertEqual((c.base, c.offset, c.datum.value), (c_base[i], c_offset[i], c_datum[i]))
+                    n = getattr(am.g_to_n(g_iv), base)
+                    n_iv = vvhgvs.location.BaseOffsetInterval(start=n, end=n)
+                    self.assertEqual(getattr(am.n_to_g(n_iv), base).base, g_back[i])
+                self.assertEqual(list(n_base), list(am.c_to_n_array(*am.n_to_c_array(n_base))))
+
+    def test_array_bounds(self):
+        am = AlignmentMapper(_AlignmentDataProvider(1), "NM_TEST.1", "NC_TEST.1", "splign")
+        with self.assertRaises(HGVSInvalidIntervalError):
+            am.g_to_n_array([1001, 1080])
+        with self.assertRaises(HGVSInvalidIntervalError):
+            am.n_to_c_array([0, 1])
+        with self.assertRaises(HGVSInvalidIntervalError):
+            am.c_to_n_array([0], [Datum.CDS_START.value])
+        self.assertEqual([1, 6, 26], list(am.c_to_n_array([-5, 1, 1], [Datum.CDS_START.value] * 2 +
+                                                           [Datum.CDS_END.value])))
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import mmap
+import pickle
+import tempfile
+import unittest
+
+import pytest
+
+from vvhgvs.alignmentmapper import AlignmentMapper
+from vvhgvs.compiledalignment import CompiledAlignment, get_compiled_alignment
+from vvhgvs.intervalmapper import IntervalMapper
+from vvhgvs.transcriptmapper import TranscriptMapper
+
+
+class _AggExonAlnDataProvider(object):
+    # a data provider without get_compiled_alignment
+    def get_tx_info(self, tx_ac, alt_ac, alt_aln_method):
+        return {"hgnc": "TEST"}
+
+    def get_agg_exon_aln(self, tx_ac, alt_ac, alt_aln_method):
+        if tx_ac != "NM_01.1":
+            return None
+        return {"alt_strand": -1, "mapped_start": 1000, "cds_start_i": 5, "cds_end_i": 25,
+                "not_quite_cigar": "10=20N5=2D3=1I4=30N6="}
+
+
+@pytest.mark.quick
+class Test_CompiledAlignment(unittest.TestCase):
+    def setUp(self):
+        self.aln = CompiledAlignment.from_cigar("NM_01.1", "NC_01.1", "splign", -1, 1000, 5, 25,
+                                                "10=20N5=2D3=1I4=30N6=")
+
+    def test_from_cigar(self):
+        aln = self.aln
+        self.assertEqual([0, 10, 30, 35, 35, 38, 39, 43, 73, 79], aln.ref_pos.tolist())
+        self.assertEqual([0, 10, 10, 15, 17, 20, 20, 24, 24, 30], aln.tgt_pos.tolist())
+        self.assertEqual(b"=N=D=I=N=", aln.ops)
+        self.assertEqual((79, 30), (aln.ref_len, aln.tgt_len))
+
+    def test_immutable(self):
+        with self.assertRaises(AttributeError):
+            self.aln.strand = 1
+        with self.assertRaises(ValueError):
+            self.aln.ref_pos[0] = 1
+
+    def test_pickle(self):
+        aln = pickle.loads(pickle.dumps(self.aln))
+        self.assertEqual(self.aln, aln)
+        self.assertFalse(aln.ref_pos.flags.writeable)
+
+    def test_buffer(self):
+        other = CompiledAlignment.from_cigar("NM_02.1", "NC_01.1", "splign", 1, 0, None, None, "5=")
+        data = self.aln.to_bytes() + other.to_bytes()
+        with tempfile.TemporaryFile() as f:
+            f.write(data)
+            f.flush()
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            aln = CompiledAlignment.from_buffer(buf, len(self.aln.to_bytes()))
+            self.assertEqual(other, aln)
+            self.assertEqual(self.aln, CompiledAlignment.from_buffer(buf))
+            del aln
+            buf.close()
+
+    def test_mappers(self):
+        am = AlignmentMapper.from_compiled_alignment(self.aln)
+        self.assertEqual((-1, 1000, 30, "10=20N5=2D3=1I4=30N6="), (am.strand, am.gc_offset, am.tgt_len, am.cigar))
+        im = IntervalMapper.from_compiled_alignment(self.aln)
+        self.assertEqual((79, 30), (im.ref_len, im.tgt_len))
+        self.assertEqual((10, 10), im.map_ref_to_tgt(15, 20))
+
+    def test_get_compiled_alignment(self):
+        hdp = _AggExonAlnDataProvider()
+        self.assertEqual(self.aln, get_compiled_alignment(hdp, "NM_01.1", "NC_01.1", "splign"))
+        self.assertIsNone(get_compiled_alignment(hdp, "NM_02.1", "NC_01.1", "splign"))
+        hdp.get_compiled_alignment = lambda tx_ac, alt_ac, alt_aln_method: self.aln
+        self.assertIs(self.aln, get_compiled_alignment(hdp, "NM_01.1", "NC_01.1", "splign"))
+
+    def test_mappers_without_get_compiled_alignment(self):
+        hdp = _AggExonAlnDataProvider()
+        am = AlignmentMapper(hdp, "NM_01.1", "NC_01.1", "splign")
+        tm = TranscriptMapper(hdp, "NM_01.1", "NC_01.1", "splign")
+        self.assertEqual((self.aln.cigar, self.aln.cigar), (am.cigar, tm.cigar))
+        self.assertEqual((30, 30), (am.tgt_len, tm.tgt_len))
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# <LICENSE>
+# Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# </LICENSE>
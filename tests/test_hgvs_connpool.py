@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+import time
+import unittest
+
+import pytest
+
+from vvhgvs.dataproviders.connpool import ConnectionPool
+from vvhgvs.exceptions import HGVSError
+
+
+class FakeConnection(object):
+    def __init__(self):
+        self.closed = 0
+        self.alive = True
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.mark.quick
+class Test_ConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.conns = []
+
+    def connect(self):
+        conn = FakeConnection()
+        self.conns.append(conn)
+        return conn
+
+    def pool(self, **kwargs):
+        kwargs.setdefault("is_alive", lambda conn: conn.alive)
+        return ConnectionPool(self.connect, 1, 2, **kwargs)
+
+    def test_reuse(self):
+        pool = self.pool()
+        self.assertEqual(1, len(self.conns))
+        c1 = pool.getconn()
+        c2 = pool.getconn()
+        self.assertEqual([c1, c2], self.conns)
+        pool.putconn(c1)
+        self.assertIs(c1, pool.getconn())
+        stats = pool.stats()
+        self.assertEqual((2, 2, 0, 3, 0),
+                         (stats["open"], stats["in_use"], stats["idle"], stats["gets"], stats["waits"]))
+
+    def test_bounded_wait(self):
+        pool = self.pool(timeout=5)
+        c1 = pool.getconn()
+        pool.getconn()
+        got = []
+        t = threading.Thread(target=lambda: got.append(pool.getconn()))
+        t.start()
+        time.sleep(0.05)
+        self.assertEqual(1, pool.stats()["waiting"])
+        pool.putconn(c1)
+        t.join()
+        self.assertEqual([c1], got)
+        self.assertEqual(2, len(self.conns))
+        stats = pool.stats()
+        self.assertEqual(1, stats["waits"])
+        self.assertGreater(stats["max_wait_time"], 0)
+
+    def test_timeout(self):
+        pool = self.pool(timeout=0.05)
+        pool.getconn()
+        pool.getconn()
+        with self.assertRaises(HGVSError):
+            pool.getconn()
+        self.assertEqual(0, pool.stats()["waiting"])
+
+    def test_closeall_wakes_waiters(self):
+        pool = self.pool()
+        c1 = pool.getconn()
+        pool.getconn()
+        errors = []
+
+        def get():
+            try:
+                pool.getconn()
+            except HGVSError as e:
+                errors.append(e)
+
+        t = threading.Thread(target=get)
+        t.start()
+        time.sleep(0.05)
+        pool.closeall()
+        t.join(5)
+        self.assertFalse(t.is_alive())
+        self.assertEqual(["connection pool is closed"], [str(e) for e in errors])
+        pool.putconn(c1)
+        stats = pool.stats()
+        self.assertEqual((2, 1, 0), (stats["opened"], stats["open"], stats["waiting"]))
+
+    def test_broken_connection_evicted(self):
+        pool = self.pool()
+        c1 = pool.getconn()
+        c2 = pool.getconn()
+        pool.putconn(c2)
+        pool.putconn(c1, broken=True)
+        self.assertTrue(c1.closed)
+        self.assertFalse(c2.closed)
+        stats = pool.stats()
+        self.assertEqual((1, 1, 1), (stats["open"], stats["idle"], stats["discarded"]))
+        self.assertIs(c2, pool.getconn())
+
+    def test_liveness_check(self):
+        pool = self.pool(check_idle=3600)
+        c1 = pool.getconn()
+        c2 = pool.getconn()
+        pool.putconn(c2)
+        c2.alive = False
+        # not checked until idle for check_idle seconds...
+        self.assertIs(c2, pool.getconn())
+        pool.putconn(c2)
+        # ... or until another connection is found to be broken
+        pool.putconn(c1, broken=True)
+        c3 = pool.getconn()
+        self.assertNotIn(c3, (c1, c2))
+        self.assertTrue(c2.closed)
+        self.assertEqual(3, pool.stats()["opened"])
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# <LICENSE>
+# Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# </LICENSE>
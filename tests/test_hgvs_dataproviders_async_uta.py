@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import asyncio
+import os
+import unittest
+from unittest import mock
+
+import pytest
+
+from vvhgvs.dataproviders.async_uta import AsyncUTA
+from vvhgvs.dataproviders.uta import _parse_url
+from vvhgvs.exceptions import HGVSDataPending
+from vvhgvs.variantmapper import VariantMapper
+
+SEQ_FILES = os.path.join(os.path.dirname(__file__), "data", "sample_data", "f2.human.rna.small.fna")
+VERSION_SQL = "select * from meta where key = 'matview_version'"
+
+
+class _Acquire(object):
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def __aenter__(self):
+        return self.pool
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class FakePool(object):
+    """stands in for an asyncpg pool and connection; dicts serve as
+    records"""
+
+    def __init__(self, results):
+        self.results = results
+        self.queries = []
+
+    def acquire(self):
+        return _Acquire(self)
+
+    async def fetch(self, sql, *args):
+        self.queries.append((sql, args))
+        await asyncio.sleep(0)
+        return self.results[sql]
+
+
+class SyncProvider(object):
+    """a synchronous data provider, which has no call coroutine"""
+
+    def __init__(self):
+        self.fetched = []
+
+    def fetch(self, i):
+        self.fetched.append(i)
+        return i
+
+
+@pytest.mark.quick
+class Test_AsyncUTA(unittest.TestCase):
+    def setUp(self):
+        self.pool = FakePool({
+            "select * from tx_exon_aln_mv where tx_ac = ANY($1)": [
+                {"tx_ac": "NM_01.1", "ord": 0},
+                {"tx_ac": "NM_02.1", "ord": 0},
+            ],
+        })
+        with mock.patch.dict(os.environ, {"HGVS_SEQ_FILES": SEQ_FILES}):
+            self.hdp = AsyncUTA(_parse_url("postgresql://localhost/uta/uta_20180821"),
+                                self.pool,
+                                results={("sql", VERSION_SQL, ()): [{"value": "0.9"}]})
+
+    def test_pending_and_resolve(self):
+        sql = "select * from tx_exon_aln_mv where tx_ac = ANY(%s)"
+        with self.assertRaises(HGVSDataPending) as cm:
+            self.hdp._fetchall(sql, [["NM_01.1", "NM_02.1"]])
+
+        async def resolve_twice():
+            # concurrent requests for the same data share one query
+            await asyncio.gather(self.hdp.resolve(cm.exception), self.hdp.resolve(cm.exception))
+
+        asyncio.run(resolve_twice())
+        self.assertEqual(1, len(self.pool.queries))
+        self.assertEqual((["NM_01.1", "NM_02.1"], ), self.pool.queries[0][1])
+        rows = self.hdp._fetchall(sql, [["NM_01.1", "NM_02.1"]])
+        self.assertEqual(["NM_01.1", "NM_02.1"], [r["tx_ac"] for r in rows])
+        self.assertEqual("NM_01.1", self.hdp._fetchone(sql, [["NM_01.1", "NM_02.1"]])[0])
+
+    def test_async_methods(self):
+        self.assertEqual("0.9", asyncio.run(self.hdp.schema_version_async()))
+        self.assertEqual("uta_20180821", asyncio.run(self.hdp.data_version_async()))
+
+    def test_results_bounded(self):
+        self.hdp._results_maxsize = 2
+        for i in range(3):
+            self.pool.results["select %d" % i] = [{"i": i}]
+            asyncio.run(self.hdp.call(self.hdp._fetchone, "select %d" % i))
+        self.assertEqual(2, len(self.hdp._results))
+        with self.assertRaises(HGVSDataPending):
+            self.hdp._fetchone("select 0")
+
+    def test_variantmapper_run_async(self):
+        self.pool.results["select 1"] = [{"i": 1}]
+        self.pool.results["select 2"] = [{"i": 2}]
+        vm = VariantMapper(self.hdp, prevalidation_level=None)
+        fetch = self.hdp._fetchone
+        self.assertEqual(3, asyncio.run(vm._run_async(lambda: fetch("select 1")[0] + fetch("select 2")[0])))
+        self.assertEqual(["select 1", "select 2"], [q[0] for q in self.pool.queries])
+
+    def test_variantmapper_run_async_sync_provider(self):
+        hdp = SyncProvider()
+        vm = VariantMapper(hdp, prevalidation_level=None)
+        self.assertEqual(3, asyncio.run(vm._run_async(lambda a, b: hdp.fetch(a) + hdp.fetch(b), 1, b=2)))
+        self.assertEqual([1, 2], hdp.fetched)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# <LICENSE>
+# Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# </LICENSE>
@@ -118,6 +118,24 @@ class UTA_Base(object):
         tx_info_options = self.hdp.get_tx_mapping_options("NM_999999.9")
         self.assertEqual(tx_info_options, [])
 
+    def test_batch_lookups(self):
+        tx_acs = ["NM_000051.3", "NM_000551.3", "NM_999999.9"]
+        self.assertEqual({tx_ac: self.hdp.get_tx_mapping_options(tx_ac) for tx_ac in tx_acs},
+                         self.hdp.get_tx_mapping_options_batch(tx_acs))
+        limits = self.hdp.get_tx_limits_batch(tx_acs)
+        self.assertEqual(["NM_000051.3", "NM_000551.3"], sorted(limits))
+        self.assertEqual(self.hdp.get_tx_limits("NM_000051.3"), limits["NM_000051.3"])
+        tx_info = self.hdp.get_tx_info_batch(tx_acs, "NC_000011.10", "splign")
+        self.assertEqual(["NM_000051.3"], list(tx_info))
+        self.assertEqual(385, tx_info["NM_000051.3"]["cds_start_i"])
+        alns = self.hdp.get_agg_exon_aln_batch(tx_acs, "NC_000011.10", "splign")
+        self.assertIsNone(alns["NM_999999.9"])
+        self.assertEqual(self.hdp.get_agg_exon_aln("NM_000051.3", "NC_000011.10", "splign"), alns["NM_000051.3"])
+
+    def test_get_seqs(self):
+        requests = [("NM_001005405.2", 10, 20), ("NC_000019.10", 0, 10), ("NM_001005405.2", 0, 15)]
+        self.assertEqual([self.hdp.get_seq(*r) for r in requests], self.hdp.get_seqs(requests))
+
 
 class Test_hgvs_dataproviders_uta_UTA_default(unittest.TestCase, UTA_Base):
     @classmethod
@@ -132,6 +150,27 @@ class Test_hgvs_dataproviders_uta_UTA_default_with_pooling(unittest.TestCase, UT
             pooling=True, mode=mode_txt, cache=CACHE)
 
 
+class Test_hgvs_dataproviders_uta_UTA_default_without_pooling(unittest.TestCase, UTA_Base):
+    @classmethod
+    def setUpClass(cls):
+        cls.hdp = vvhgvs.dataproviders.uta.connect(
+            pooling=False, mode=mode_txt, cache=CACHE)
+
+
+class Test_hgvs_dataproviders_uta_UTA_default_with_prepared_statements(unittest.TestCase, UTA_Base):
+    @classmethod
+    def setUpClass(cls):
+        cls.hdp = vvhgvs.dataproviders.uta.connect(
+            prepared_statements=True, mode=mode_txt, cache=CACHE)
+
+
+class Test_positional_params(unittest.TestCase):
+    def test_positional_params(self):
+        pp = vvhgvs.dataproviders.uta._positional_params
+        self.assertEqual("select * from t where a=$1 and b < $2", pp("select * from t where a=%s and b < %s"))
+        self.assertEqual("where a LIKE $1 || ',%'", pp("where a LIKE %s || ',%%'"))
+
+
 class TestUTACache(Test_hgvs_dataproviders_uta_UTA_default):
     def _create_cdna_variant(self):
         start = vvhgvs.location.SimplePosition(118898437)
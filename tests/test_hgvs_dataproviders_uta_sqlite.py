@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import gc
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import weakref
+from unittest import mock
+
+import pytest
+
+import vvhgvs.dataproviders.uta
+from vvhgvs.dataproviders.uta_export import _sqlite_type, _sqlite_value
+from vvhgvs.exceptions import HGVSDataNotAvailableError
+from vvhgvs.variantmapper import VariantMapper, alignment_mapper_cache_info
+
+SEQ_FILES = os.path.join(os.path.dirname(__file__), "data", "sample_data", "f2.human.rna.small.fna")
+
+
+def _write_snapshot(path):
+    """writes a minimal snapshot with the layout written by uta_export"""
+    db = sqlite3.connect(path)
+    db.executescript("""
+        create table meta (key text, value text);
+        insert into meta values ('schema_version', '1.1'), ('matview_version', '0.9'),
+            ('data_version', 'uta_20180821');
+        create table gene (hgnc text, hgnc_id text, aliases text);
+        insert into gene values ('VHL', 'HGNC:12687', 'HRCA1,RCA1,VHL1'), ('ATM', 'HGNC:795', 'AT1,ATA');
+        create table transcript_lengths_mv (ac text, cds_start_i integer, cds_end_i integer, length integer,
+            hgnc text);
+        insert into transcript_lengths_mv values ('NM_000551.3', 213, 855, 4560, 'VHL'),
+            ('NM_000051.3', 385, 9556, 13147, 'ATM');
+        create table full_tx_aln_w_nq_cigar_mv (tx_ac text, alt_ac text, alt_aln_method text, alt_strand integer,
+            mapped_start integer, not_quite_cigar text, mapped_end integer, cds_start_i integer,
+            cds_end_i integer, transcript_exon_start_end json, mapped_exon_start_end json);
+        insert into full_tx_aln_w_nq_cigar_mv values ('NM_000551.3', 'NC_000003.11', 'splign', 1, 10183318,
+            '4560=', 10195354, 213, 855, '[0, 553, 553, 676, 676, 4560]',
+            '[10183318, 10183871, 10188197, 10188320, 10191470, 10195354]');
+        create table all_mapped_transcript_mv (hgnc text, cds_start_i integer, cds_end_i integer, tx_ac text,
+            alt_ac text, alt_aln_method text);
+        insert into all_mapped_transcript_mv values ('VHL', 213, 855, 'NM_000551.3', 'NC_000003.11', 'splign');
+        create table tx_exon_aln_mv (tx_ac text, alt_ac text, alt_aln_method text, cigar text);
+        insert into tx_exon_aln_mv values ('NM_000551.3', 'NC_000003.11', 'splign', '553='),
+            ('NM_000551.3', 'NC_000003.11', 'blat', '553=');
+        create table current_valid_mapped_transcript_spans_mv (tx_ac text, alt_ac text, alt_strand integer,
+            alt_aln_method text, start_i integer, end_i integer);
+        insert into current_valid_mapped_transcript_spans_mv values
+            ('NM_000551.3', 'NC_000003.11', 1, 'splign', 10183318, 10195354);
+        create table tx_similarity_v (tx_ac1 text, tx_ac2 text, cds_eq boolean, es_fp_eq boolean);
+        insert into tx_similarity_v values ('NM_000551.3', 'ENST00000256474', 1, 0);
+        """)
+    db.commit()
+    db.close()
+
+
+@pytest.mark.quick
+class Test_UTA_sqlite(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.tmpdir, "uta.db")
+        _write_snapshot(cls.path)
+        with mock.patch.dict(os.environ, {"HGVS_SEQ_FILES": SEQ_FILES}):
+            cls.hdp = vvhgvs.dataproviders.uta.connect("sqlite:///" + cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.hdp.close()
+        shutil.rmtree(cls.tmpdir)
+
+    def test_versions(self):
+        self.assertIsInstance(self.hdp, vvhgvs.dataproviders.uta.UTA_sqlite)
+        self.assertEqual("0.9", self.hdp.schema_version())
+        self.assertEqual("uta_20180821", self.hdp.data_version())
+
+    def test_missing_file(self):
+        with mock.patch.dict(os.environ, {"HGVS_SEQ_FILES": SEQ_FILES}), self.assertRaises(HGVSDataNotAvailableError):
+            vvhgvs.dataproviders.uta.connect("sqlite:///" + os.path.join(self.tmpdir, "missing.db"))
+
+    def test_get_seq_maxbytes(self):
+        cfg = vvhgvs.global_config
+        # the seqfetcher block and transcript caches hold the same bases
+        self.assertEqual(cfg.lru_cache.get_seq_maxbytes_seqcache, self.hdp.get_seq.cache_bytes_info().maxbytes)
+        saved = cfg.seqfetcher.block_cache_maxbytes, cfg.seqfetcher.transcript_cache_maxbytes
+        cfg.seqfetcher.block_cache_maxbytes = cfg.seqfetcher.transcript_cache_maxbytes = 0
+        try:
+            with mock.patch.dict(os.environ, {"HGVS_SEQ_FILES": SEQ_FILES}):
+                hdp = vvhgvs.dataproviders.uta.connect("sqlite:///" + self.path)
+        finally:
+            cfg.seqfetcher.block_cache_maxbytes, cfg.seqfetcher.transcript_cache_maxbytes = saved
+        self.assertEqual(cfg.lru_cache.get_seq_maxbytes, hdp.get_seq.cache_bytes_info().maxbytes)
+
+    def test_get_agg_exon_aln(self):
+        aln = self.hdp.get_agg_exon_aln("NM_000551.3", "NC_000003.11", "splign")
+        self.assertEqual([0, 553, 553, 676, 676, 4560], aln["transcript_exon_start_end"])
+        self.assertEqual(10183318, aln["mapped_start"])
+        self.assertIsNone(self.hdp.get_agg_exon_aln("NM_000051.3", "NC_000003.11", "splign"))
+
+    def test_get_tx_identity_info(self):
+        info = self.hdp.get_tx_identity_info("NM_000551.3")
+        self.assertEqual([4560], info["lengths"])
+        self.assertEqual("VHL", info["hgnc"])
+
+    def test_get_tx_for_region(self):
+        self.assertEqual(["NM_000551.3"],
+                         [r["tx_ac"] for r in self.hdp.get_tx_for_region("NC_000003.11", "splign", 10183320, 10183330)])
+        self.assertEqual([], self.hdp.get_tx_for_region("NC_000003.11", "splign", 10195355, 10195360))
+
+    def test_get_tx_for_region_span_index(self):
+        with mock.patch.dict(os.environ, {"HGVS_SEQ_FILES": SEQ_FILES}):
+            hdp = vvhgvs.dataproviders.uta.connect("sqlite:///" + self.path, span_index=True)
+        self.assertEqual(1, hdp.load_span_index("splign", ["NC_000003.11", "NC_000004.11"]))
+        self.assertEqual(self.hdp.get_tx_for_region("NC_000003.11", "splign", 10195354, 10195360),
+                         hdp.get_tx_for_region("NC_000003.11", "splign", 10195360, 10195354))
+        self.assertEqual([], hdp.get_tx_for_region("NC_000003.11", "splign", 10195355, 10195360))
+        self.assertEqual([], hdp.get_tx_for_region("NC_000004.11", "splign", 10195354, 10195360))
+
+    def test_prefetch_region(self):
+        with mock.patch.dict(os.environ, {"HGVS_SEQ_FILES": SEQ_FILES}):
+            hdp = vvhgvs.dataproviders.uta.connect("sqlite:///" + self.path)
+        vm = VariantMapper(hdp, prevalidation_level=None)
+        self.assertEqual(["NM_000551.3"], vm.prefetch_region("NC_000003.11", 10183000, 10190000, "splign"))
+        self.assertEqual(1, alignment_mapper_cache_info(hdp).currsize)
+
+        # everything needed for mapping in the region is now in memory
+        with mock.patch.object(hdp, "_fetchall", side_effect=AssertionError("query")):
+            self.assertEqual(["NM_000551.3"],
+                             [r["tx_ac"] for r in hdp.get_tx_for_region("NC_000003.11", "splign", 10183400, 10183401)])
+            self.assertEqual([], hdp.get_tx_for_region("NC_000003.11", "splign", 10183000, 10183001))
+            self.assertEqual(213, hdp.get_tx_limits("NM_000551.3")["cds_start_i"])
+            self.assertEqual("VHL", hdp.get_tx_info("NM_000551.3", "NC_000003.11", "splign")["hgnc"])
+            self.assertEqual(2, len(hdp.get_tx_mapping_options("NM_000551.3")))
+            tm = vm._fetch_AlignmentMapper(tx_ac="NM_000551.3", alt_ac="NC_000003.11", alt_aln_method="splign")
+
+        # mappers are shared by all users of the provider
+        vm2 = VariantMapper(hdp, prevalidation_level=None)
+        self.assertIs(tm, vm2._fetch_AlignmentMapper("NM_000551.3", "NC_000003.11", "splign"))
+        self.assertEqual(2, alignment_mapper_cache_info(hdp).hits)
+
+        # the cache is freed with the provider
+        hdp_ref = weakref.ref(hdp)
+        del hdp, vm, vm2, tm
+        gc.collect()
+        self.assertIsNone(hdp_ref())
+
+    def _prefetched_hdp(self, start, end):
+        with mock.patch.dict(os.environ, {"HGVS_SEQ_FILES": SEQ_FILES}):
+            hdp = vvhgvs.dataproviders.uta.connect("sqlite:///" + self.path)
+        hdp.prefetch_region("NC_000003.11", start, end, "splign")
+        return hdp
+
+    def test_prefetched_region_served(self):
+        hdp = self._prefetched_hdp(10183000, 10190000)
+        self.assertEqual([(10183000, 10190000)], [r[:2] for r in hdp._prefetched_regions.values()])
+        with mock.patch.object(hdp, "_fetchall", side_effect=AssertionError("query")):
+            self.assertEqual(["NM_000551.3"],
+                             [r["tx_ac"] for r in hdp.get_tx_for_region("NC_000003.11", "splign", 10183000, 10190000)])
+            self.assertEqual([], hdp.get_tx_for_region("NC_000003.11", "splign", 10183000, 10183317))
+
+    def test_prefetched_region_fallback(self):
+        hdp = self._prefetched_hdp(10183000, 10190000)
+        fetchall = mock.Mock(wraps=hdp._fetchall)
+        with mock.patch.object(hdp, "_fetchall", fetchall):
+            # partly or wholly outside the region, on another alt_ac or with another method
+            self.assertEqual(["NM_000551.3"],
+                             [r["tx_ac"] for r in hdp.get_tx_for_region("NC_000003.11", "splign", 10189000, 10191000)])
+            self.assertEqual([], hdp.get_tx_for_region("NC_000003.11", "splign", 10182000, 10183000))
+            self.assertEqual([], hdp.get_tx_for_region("NC_000004.11", "splign", 10183400, 10183401))
+            self.assertEqual([], hdp.get_tx_for_region("NC_000003.11", "blat", 10183400, 10183401))
+        self.assertEqual(4, fetchall.call_count)
+
+    def test_prefetched_region_replaced(self):
+        hdp = self._prefetched_hdp(10183000, 10190000)
+        hdp.prefetch_region("NC_000003.11", 10190000, 10196000, "splign")
+        self.assertEqual([("NC_000003.11", "splign")], list(hdp._prefetched_regions))
+        fetchall = mock.Mock(wraps=hdp._fetchall)
+        with mock.patch.object(hdp, "_fetchall", fetchall):
+            self.assertEqual(["NM_000551.3"],
+                             [r["tx_ac"] for r in hdp.get_tx_for_region("NC_000003.11", "splign", 10191000, 10192000)])
+            self.assertEqual(0, fetchall.call_count)
+            # the earlier region is no longer held
+            self.assertEqual(["NM_000551.3"],
+                             [r["tx_ac"] for r in hdp.get_tx_for_region("NC_000003.11", "splign", 10183400, 10183401)])
+            self.assertEqual(1, fetchall.call_count)
+
+    def test_get_compiled_alignment(self):
+        aln = self.hdp.get_compiled_alignment("NM_000551.3", "NC_000003.11", "splign")
+        self.assertIs(aln, self.hdp.get_compiled_alignment("NM_000551.3", "NC_000003.11", "splign"))
+        self.assertEqual([0, 4560], aln.tgt_pos.tolist())
+        self.assertEqual(10183318, aln.gc_offset)
+        self.assertIsNone(self.hdp.get_compiled_alignment("NM_000051.3", "NC_000003.11", "splign"))
+
+    def test_get_gene_info_by_alias(self):
+        self.assertEqual(["VHL"], [r["hgnc"] for r in self.hdp.get_gene_info_by_alias("RCA1")])
+        self.assertEqual([], self.hdp.get_gene_info_by_alias("rca1"))
+        self.assertEqual("HGNC:795", self.hdp.get_gene_info("ATM")["hgnc_id"])
+
+    def test_get_gene_info_by_alias_index(self):
+        with mock.patch.dict(os.environ, {"HGVS_SEQ_FILES": SEQ_FILES}):
+            hdp = vvhgvs.dataproviders.uta.connect("sqlite:///" + self.path, alias_index=False)
+            ihdp = vvhgvs.dataproviders.uta.connect("sqlite:///" + self.path, alias_index=True)
+        for alias in ("HRCA1", "RCA1", "VHL1", "ATA", "rca1", "CA1", "VHL"):
+            self.assertEqual(hdp.get_gene_info_by_alias(alias), ihdp.get_gene_info_by_alias(alias))
+        with mock.patch.object(ihdp, "_fetchall", side_effect=AssertionError("query")):
+            self.assertEqual(["ATM"], [r["hgnc"] for r in ihdp.get_gene_info_by_alias("AT1")])
+
+    def test_get_similar_transcripts(self):
+        sim = self.hdp.get_similar_transcripts("NM_000551.3")[0]
+        self.assertIs(True, sim["cds_eq"])
+        self.assertIs(False, sim["es_fp_eq"])
+
+    def test_no_global_converters(self):
+        # json and boolean columns are decoded by the provider, not by
+        # converters registered with the sqlite3 module
+        self.assertNotIn("JSON", sqlite3.converters)
+        self.assertNotIn("BOOLEAN", sqlite3.converters)
+
+    def test_batches(self):
+        limits = self.hdp.get_tx_limits_batch(["NM_000551.3", "NM_000051.3", "NM_999999.1"])
+        self.assertEqual({"NM_000551.3", "NM_000051.3"}, set(limits))
+        alns = self.hdp.get_agg_exon_aln_batch(["NM_000051.3", "NM_000551.3"], "NC_000003.11", "splign")
+        self.assertIsNone(alns["NM_000051.3"])
+        self.assertEqual(10195354, alns["NM_000551.3"]["mapped_end"])
+        opts = self.hdp.get_tx_mapping_options_batch(["NM_000551.3", "NM_000051.3"])
+        self.assertEqual(["blat", "splign"], sorted(r["alt_aln_method"] for r in opts["NM_000551.3"]))
+        self.assertEqual([], opts["NM_000051.3"])
+        self.assertEqual("VHL", self.hdp.get_tx_info_batch(["NM_000551.3"], "NC_000003.11", "splign")["NM_000551.3"][0])
+
+
+@pytest.mark.quick
+class Test_uta_export(unittest.TestCase):
+    def test_types(self):
+        self.assertEqual("json", _sqlite_type("integer[]"))
+        self.assertEqual("integer", _sqlite_type("bigint"))
+        self.assertEqual("boolean", _sqlite_type("boolean"))
+        self.assertEqual("text", _sqlite_type("timestamp without time zone"))
+        self.assertEqual("[1, 2]", _sqlite_value([1, 2]))
+        self.assertEqual(3, _sqlite_value(3))
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# <LICENSE>
+# Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# </LICENSE>
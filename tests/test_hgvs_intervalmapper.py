@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import unittest
+
+import pytest
+
+from vvhgvs.exceptions import HGVSInvalidIntervalError
+from vvhgvs.intervalmapper import IntervalMapper
+
+
+@pytest.mark.quick
+class Test_IntervalMapper(unittest.TestCase):
+    def setUp(self):
+        # the alignment in the vvhgvs.intervalmapper module documentation
+        self.im = IntervalMapper.from_cigar("15=5I15=5D15=")
+
+    def test_boundaries(self):
+        im = self.im
+        self.assertEqual((50, 50), (im.ref_len, im.tgt_len))
+        self.assertEqual((29, 36), im.map_ref_to_tgt(34, 36))
+        self.assertEqual((30, 35), im.map_ref_to_tgt(35, 35))
+        self.assertEqual((29, 30), im.map_ref_to_tgt(34, 35))
+        self.assertEqual((29, 35), im.map_ref_to_tgt(34, 35, max_extent=True))
+        self.assertEqual((35, 36), im.map_ref_to_tgt(35, 36))
+        self.assertEqual((30, 36), im.map_ref_to_tgt(35, 36, max_extent=True))
+        self.assertEqual((15, 15), im.map_ref_to_tgt(16, 18))
+        self.assertEqual((15, 20), im.map_tgt_to_ref(15, 15))
+        self.assertEqual((35, 35), im.map_tgt_to_ref(31, 33))
+        self.assertEqual((0, 50), im.map_tgt_to_ref(0, 50))
+
+    def test_out_of_bounds(self):
+        for start_i, end_i in ((-1, 5), (45, 51), (51, 52)):
+            with self.assertRaises(HGVSInvalidIntervalError):
+                self.im.map_ref_to_tgt(start_i, end_i)
+
+    def test_many_exons(self):
+        im = IntervalMapper.from_cigar("1000N".join(["100="] * 500))
+        self.assertEqual((45010, 45020), im.map_ref_to_tgt(495010, 495020))
+        self.assertEqual((45100, 45100), im.map_ref_to_tgt(495200, 495300))
+        self.assertEqual((495010, 495020), im.map_tgt_to_ref(45010, 45020))
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# <LICENSE>
+# Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# </LICENSE>
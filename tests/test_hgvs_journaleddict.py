@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import pytest
+
+from vvhgvs.decorators.lru_cache import _make_key
+from vvhgvs.utils.JournaledDict import JournaledDict
+from vvhgvs.utils.PersistentDict import PersistentDict
+
+
+@pytest.mark.quick
+class Test_JournaledDict(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.fn = os.path.join(self.tmpdir, "cache.hdp")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_sync_appends_only_new_records(self):
+        d = JournaledDict(self.fn, flag='c', compact_ratio=1e9)
+        d["a"] = 1
+        d.sync()
+        size1 = os.path.getsize(d.journal_filename)
+        d["b"] = 2
+        d.sync()
+        size2 = os.path.getsize(d.journal_filename)
+        self.assertGreater(size2, size1)
+        self.assertLess(size2 - size1, 2 * size1)
+        self.assertFalse(os.path.exists(self.fn))
+
+        r = JournaledDict(self.fn, flag='r')
+        self.assertEqual({"a": 1, "b": 2}, dict(r))
+
+    def test_compaction(self):
+        d = JournaledDict(self.fn, flag='c')
+        for i in range(100):
+            d[i] = str(i)
+            d.sync()
+        d.close()
+        self.assertEqual(0, os.path.getsize(d.journal_filename))
+        with open(self.fn, 'rb') as f:
+            self.assertEqual(100, len(pickle.load(f)))
+        self.assertEqual(100, len(PersistentDict(self.fn, flag='r')))
+
+    def test_reads_persistentdict_snapshot(self):
+        p = PersistentDict(self.fn, flag='c')
+        key = _make_key("get_tx_info", ("NM_000551.3", "NC_000003.12", "splign"), {}, False, ())
+        p[key] = ["VHL", 70, 711]
+        p.sync()
+        d = JournaledDict(self.fn, flag='c')
+        self.assertEqual(["VHL", 70, 711], d[key])
+
+    def test_torn_journal_tail_is_discarded(self):
+        d = JournaledDict(self.fn, flag='c', compact_ratio=1e9)
+        d["a"] = 1
+        d["b"] = 2
+        d.sync()
+        with open(d.journal_filename, 'ab') as f:
+            f.write(b"\x00\x00\x01\x00garbage")
+        good_size = d._journal_size
+
+        d2 = JournaledDict(self.fn, flag='c', compact_ratio=1e9)
+        self.assertEqual({"a": 1, "b": 2}, dict(d2))
+        self.assertEqual(good_size, os.path.getsize(d.journal_filename))
+        d2["c"] = 3
+        d2.sync()
+        self.assertEqual({"a": 1, "b": 2, "c": 3}, dict(JournaledDict(self.fn, flag='r')))
+
+    def test_readonly_missing_file(self):
+        with self.assertRaises(IOError):
+            JournaledDict(self.fn, flag='r')
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# <LICENSE>
+# Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# </LICENSE>
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import unittest
+
+import pytest
+
+import vvhgvs
+from vvhgvs.dataproviders.interface import _lru_cache_params
+from vvhgvs.decorators.lru_cache import lru_cache
+from vvhgvs.exceptions import HGVSDataNotAvailableError
+
+
+@pytest.mark.quick
+class Test_lru_cache(unittest.TestCase):
+    def test_maxsize(self):
+        calls = []
+
+        @lru_cache(maxsize=2)
+        def f(x):
+            calls.append(x)
+            return x * 2
+
+        self.assertEqual([2, 4, 2], [f(1), f(2), f(1)])
+        f(3)    # evicts 2, the least recently used
+        f(1)
+        f(2)
+        self.assertEqual([1, 2, 3, 2], calls)
+        hits, misses, maxsize, currsize = f.cache_info()
+        self.assertEqual((2, 4, 2, 2), (hits, misses, maxsize, currsize))
+        self.assertEqual((None, 0), f.cache_bytes_info())
+
+    def test_maxbytes(self):
+        calls = []
+
+        @lru_cache(maxsize=100, maxbytes=10)
+        def get_seq(ac, n):
+            calls.append(ac)
+            return "A" * n
+
+        get_seq("a", 4)
+        get_seq("b", 4)
+        self.assertEqual(8, get_seq.cache_bytes_info().currbytes)
+        get_seq("c", 4)    # evicts a
+        self.assertEqual((2, 8), (get_seq.cache_info().currsize, get_seq.cache_bytes_info().currbytes))
+        get_seq("b", 4)
+        get_seq("a", 4)
+        self.assertEqual(["a", "b", "c", "a"], calls)
+        get_seq("d", 11)    # too large to cache
+        get_seq("d", 11)
+        self.assertEqual(["a", "b", "c", "a", "d", "d"], calls)
+        self.assertLessEqual(get_seq.cache_bytes_info().currbytes, 10)
+        get_seq.cache_clear()
+        self.assertEqual((0, 0), (get_seq.cache_info().currsize, get_seq.cache_bytes_info().currbytes))
+
+    def test_cache_prime(self):
+        for policy in ("lru", "clock"):
+            calls = []
+
+            @lru_cache(maxsize=2, policy=policy)
+            def f(x, y):
+                calls.append(x)
+                return x + y
+
+            f.cache_prime((1, 1), 20)
+            f.cache_prime((2, 2), 40)
+            self.assertEqual([20, 40], [f(1, 1), f(2, 2)])
+            f.cache_prime((1, 1), 30)    # already cached; kept
+            self.assertEqual(20, f(1, 1))
+            self.assertEqual([], calls)
+            ci = f.cache_info()
+            self.assertEqual((3, 0, 2), (ci.hits, ci.misses, ci.currsize))
+
+    def test_clock_policy(self):
+        calls = []
+
+        @lru_cache(maxsize=2, policy="clock")
+        def f(x):
+            calls.append(x)
+            return x * 2
+
+        self.assertEqual([2, 4, 2], [f(1), f(2), f(1)])
+        f(3)    # 1 was referenced and gets a second chance; 2 is evicted
+        f(1)
+        f(2)
+        self.assertEqual([1, 2, 3, 2], calls)
+        hits, misses, maxsize, currsize = f.cache_info()
+        self.assertEqual((2, 4, 2, 2), (hits, misses, maxsize, currsize))
+        self.assertEqual((None, 0), f.cache_bytes_info())
+        f.cache_clear()
+        self.assertEqual((0, 0, 0), f.cache_info()[:2] + (f.cache_info().currsize, ))
+        f(1)
+        self.assertEqual([1, 2, 3, 2, 1], calls)
+
+    def test_clock_policy_maxbytes(self):
+        @lru_cache(maxsize=100, maxbytes=10, policy="clock")
+        def get_seq(ac, n):
+            return "A" * n
+
+        for i in range(20):
+            get_seq(str(i), 1 + i % 4)
+            self.assertLessEqual(get_seq.cache_bytes_info().currbytes, 10)
+        hits = get_seq.cache_info().hits
+        get_seq("19", 4)
+        self.assertEqual(hits + 1, get_seq.cache_info().hits)
+
+    def test_negative_caching(self):
+        calls = []
+
+        @lru_cache(maxsize=10, negative_maxsize=2, negative_ttl=300)
+        def get_tx_limits(tx_ac):
+            calls.append(tx_ac)
+            raise HGVSDataNotAvailableError("No transcript definition for (tx_ac={})".format(tx_ac))
+
+        for _ in range(3):
+            with self.assertRaisesRegex(HGVSDataNotAvailableError, "NM_999999.9"):
+                get_tx_limits("NM_999999.9")
+        self.assertEqual(["NM_999999.9"], calls)
+
+        get_tx_limits.cache_clear()
+        with self.assertRaises(HGVSDataNotAvailableError):
+            get_tx_limits("NM_999999.9")
+        self.assertEqual(["NM_999999.9"] * 2, calls)
+
+    def test_negative_caching_expires(self):
+        calls = []
+
+        @lru_cache(maxsize=None, negative_maxsize=10, negative_ttl=0)
+        def get_tx_limits(tx_ac):
+            calls.append(tx_ac)
+            raise HGVSDataNotAvailableError(tx_ac)
+
+        for _ in range(2):
+            with self.assertRaises(HGVSDataNotAvailableError):
+                get_tx_limits("NM_999999.9")
+        self.assertEqual(2, len(calls))
+
+    def test_per_method_params(self):
+        cfg = vvhgvs.global_config.lru_cache
+        self.assertEqual({
+            "maxsize": cfg.maxsize,
+            "policy": cfg.provider_policy
+        }, _lru_cache_params("get_gene_info"))
+        self.assertEqual({
+            "maxsize": cfg.get_seq_maxsize,
+            "maxbytes": cfg.get_seq_maxbytes,
+            "policy": cfg.provider_policy
+        }, _lru_cache_params("get_seq"))
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# <LICENSE>
+# Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# </LICENSE>
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import pytest
+
+from vvhgvs.decorators.lru_cache import lru_cache, _make_key, RUN, VERIFY
+from vvhgvs.exceptions import HGVSDataNotAvailableError, HGVSVerifyFailedError
+from vvhgvs.utils.MappedDict import MappedDict
+
+
+@pytest.mark.quick
+class Test_MappedDict(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.fn = os.path.join(self.tmpdir, "cache.mhdp")
+        self.data = {
+            _make_key("get_tx_limits", ("NM_%06d.1" % i, ), {}, False, ()): ["NM_%06d.1" % i, i, i + 100, i * 3]
+            for i in range(500)
+        }
+        MappedDict.create(self.fn, self.data)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_lookup(self):
+        md = MappedDict(self.fn)
+        self.assertEqual(len(self.data), len(md))
+        for key, value in self.data.items():
+            self.assertIn(key, md)
+            self.assertEqual(value, md[key])
+        missing = _make_key("get_tx_limits", ("NM_999999.9", ), {}, False, ())
+        self.assertIsNone(md.get(missing))
+        with self.assertRaises(KeyError):
+            md[missing]
+        self.assertEqual(sorted(self.data.items()), sorted(md.items()))
+        md.close()
+
+    def test_is_mapped(self):
+        self.assertTrue(MappedDict.is_mapped(self.fn))
+        self.assertFalse(MappedDict.is_mapped(os.path.join(self.tmpdir, "missing")))
+
+    def test_run_mode(self):
+        @lru_cache(mode=RUN, cache=MappedDict(self.fn))
+        def get_tx_limits(tx_ac):
+            raise AssertionError("should not be called in run mode")
+
+        self.assertEqual(["NM_000007.1", 7, 107, 21], get_tx_limits("NM_000007.1"))
+        with self.assertRaises(HGVSDataNotAvailableError):
+            get_tx_limits("NM_999999.9")
+
+    def test_verify_mode(self):
+        results = {"NM_000007.1": ["NM_000007.1", 7, 107, 21], "NM_000008.1": ["NM_000008.1", 0, 0, 0]}
+
+        @lru_cache(mode=VERIFY, cache=MappedDict(self.fn))
+        def get_tx_limits(tx_ac):
+            return results.get(tx_ac, [tx_ac, 1, 2, 3])
+
+        self.assertEqual(["NM_000007.1", 7, 107, 21], get_tx_limits("NM_000007.1"))
+        # misses are computed and returned; the read-only file is left as is
+        self.assertEqual(["NM_999999.9", 1, 2, 3], get_tx_limits("NM_999999.9"))
+        self.assertEqual(["NM_999999.9", 1, 2, 3], get_tx_limits("NM_999999.9"))
+        self.assertEqual(len(self.data), len(MappedDict(self.fn)))
+        with self.assertRaises(HGVSVerifyFailedError):
+            get_tx_limits("NM_000008.1")
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# <LICENSE>
+# Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# </LICENSE>
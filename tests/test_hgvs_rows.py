@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import pickle
+import unittest
+
+import pytest
+
+from vvhgvs.dataproviders.rows import Row, row_class
+
+
+@pytest.mark.quick
+class Test_Row(unittest.TestCase):
+    def setUp(self):
+        self.cls = row_class(("hgnc", "cds_start_i", "cds_end_i", "tx_ac", "alt_ac", "alt_aln_method"))
+        self.row = self.cls(("ATM", 385, 9556, "NM_000051.3", "NC_000011.10", "splign"))
+
+    def test_access(self):
+        row = self.row
+        self.assertIsInstance(row, Row)
+        self.assertEqual("NM_000051.3", row["tx_ac"])
+        self.assertEqual(385, row[1])
+        self.assertEqual("splign", row[-1])
+        self.assertEqual((385, 9556), row[1:3])
+        self.assertEqual("ATM", row.get("hgnc"))
+        self.assertIsNone(row.get("missing"))
+        with self.assertRaises(KeyError):
+            row["missing"]
+        with self.assertRaises(IndexError):
+            row[6]
+        self.assertEqual(["hgnc", "cds_start_i", "cds_end_i", "tx_ac", "alt_ac", "alt_aln_method"], row.keys())
+        self.assertEqual({"hgnc": "ATM", "cds_start_i": 385, "cds_end_i": 9556, "tx_ac": "NM_000051.3",
+                          "alt_ac": "NC_000011.10", "alt_aln_method": "splign"}, dict(row))
+
+    def test_equality(self):
+        values = ["ATM", 385, 9556, "NM_000051.3", "NC_000011.10", "splign"]
+        self.assertEqual(values, self.row)
+        self.assertEqual(self.row, values)
+        self.assertEqual(tuple(values), self.row)
+        self.assertNotEqual(values[:-1] + ["blat"], self.row)
+        self.assertEqual(hash(tuple(values)), hash(self.row))
+
+    def test_shared_class(self):
+        self.assertIs(self.cls, row_class(["hgnc", "cds_start_i", "cds_end_i", "tx_ac", "alt_ac", "alt_aln_method"]))
+        self.assertIsNot(self.cls, row_class(["tx_ac"]))
+        self.assertFalse(hasattr(self.row, "__dict__"))
+
+    def test_pickle(self):
+        row2 = pickle.loads(pickle.dumps(self.row, -1))
+        self.assertIs(type(self.row), type(row2))
+        self.assertEqual(self.row, row2)
+        self.assertEqual("NC_000011.10", row2["alt_ac"])
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# <LICENSE>
+# Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# </LICENSE>
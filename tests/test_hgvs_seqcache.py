@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import random
+import unittest
+
+import pytest
+
+from vvhgvs.dataproviders.seqcache import BlockSeqCache, TranscriptSeqCache, fetch_seqs
+
+
+class _CountingFetcher(object):
+    def __init__(self, seqs):
+        self.seqs = seqs
+        self.calls = []
+
+    def __call__(self, ac, start_i=None, end_i=None):
+        self.calls.append((ac, start_i, end_i))
+        return self.seqs[ac][start_i:end_i]
+
+
+@pytest.mark.quick
+class Test_BlockSeqCache(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        self.seqs = {
+            "NC_000001.11": "".join(rng.choice("ACGT") for _ in range(10000)),
+            "NC_000002.12": "".join(rng.choice("ACGT") for _ in range(4096)),
+        }
+        self.fetcher = _CountingFetcher(self.seqs)
+
+    def test_slices_match(self):
+        bsc = BlockSeqCache(self.fetcher, block_size=1000, maxbytes=3000)
+        rng = random.Random(1)
+        for _ in range(500):
+            ac = rng.choice(sorted(self.seqs))
+            start_i = rng.randrange(0, 10500)
+            end_i = start_i + rng.randrange(0, 2500)
+            self.assertEqual(self.seqs[ac][start_i:end_i], bsc.fetch_seq(ac, start_i, end_i))
+            self.assertLessEqual(bsc.cache_info()["currbytes"], 3000)
+        self.assertEqual(self.seqs["NC_000002.12"], bsc.fetch_seq("NC_000002.12"))
+
+    def test_overlapping_windows_hit(self):
+        bsc = BlockSeqCache(self.fetcher, block_size=4096)
+        for start_i in range(5000, 5100, 5):
+            bsc.fetch_seq("NC_000001.11", start_i - 20, start_i + 20)
+            bsc.fetch_seq("NC_000001.11", start_i, start_i + 1)
+        self.assertEqual([("NC_000001.11", 4096, 8192)], self.fetcher.calls)
+
+    def test_missing_blocks_fetched_in_one_call(self):
+        bsc = BlockSeqCache(self.fetcher, block_size=100)
+        bsc.fetch_seq("NC_000001.11", 450, 460)
+        bsc.fetch_seq("NC_000001.11", 150, 950)
+        self.assertEqual([("NC_000001.11", 400, 500), ("NC_000001.11", 100, 400), ("NC_000001.11", 500, 1000)],
+                         self.fetcher.calls)
+
+    def test_end_of_sequence(self):
+        bsc = BlockSeqCache(self.fetcher, block_size=1024)
+        self.assertEqual(self.seqs["NC_000002.12"][4000:], bsc.fetch_seq("NC_000002.12", 4000, 5000))
+        self.assertEqual("", bsc.fetch_seq("NC_000002.12", 4096, 4200))
+        self.assertEqual("", bsc.fetch_seq("NC_000002.12", 9000, 9100))
+
+
+@pytest.mark.quick
+class Test_TranscriptSeqCache(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        self.seqs = {
+            ac: "".join(rng.choice("ACGT") for _ in range(1000))
+            for ac in ("NM_000001.1", "NR_000002.1", "ENST00000000003")
+        }
+        self.fetcher = _CountingFetcher(self.seqs)
+
+    def test_handles(self):
+        tsc = TranscriptSeqCache(self.fetcher)
+        self.assertTrue(tsc.handles("NM_000001.1"))
+        self.assertTrue(tsc.handles("XR_000001.1"))
+        self.assertTrue(tsc.handles("ENST00000000003"))
+        self.assertFalse(tsc.handles("NC_000001.11"))
+        self.assertFalse(tsc.handles("NG_000001.1"))
+
+    def test_whole_sequence_fetched_once(self):
+        tsc = TranscriptSeqCache(self.fetcher)
+        rng = random.Random(1)
+        for _ in range(100):
+            start_i = rng.randrange(0, 1100)
+            end_i = rng.choice([None, start_i + rng.randrange(0, 50)])
+            self.assertEqual(self.seqs["NM_000001.1"][start_i:end_i], tsc.fetch_seq("NM_000001.1", start_i, end_i))
+        self.assertEqual([("NM_000001.1", None, None)], self.fetcher.calls)
+        self.assertEqual(99, tsc.cache_info()["hits"])
+
+    def test_eviction(self):
+        tsc = TranscriptSeqCache(self.fetcher, maxbytes=2500)
+        for ac in ("NM_000001.1", "NR_000002.1", "NM_000001.1", "ENST00000000003", "NM_000001.1"):
+            tsc.fetch_seq(ac, 0, 10)
+        self.assertEqual(["NM_000001.1", "NR_000002.1", "ENST00000000003"], [c[0] for c in self.fetcher.calls])
+        self.assertEqual({"hits": 2, "misses": 3, "currsize": 2, "currbytes": 2000, "maxbytes": 2500},
+                         tsc.cache_info())
+
+
+@pytest.mark.quick
+class Test_fetch_seqs(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        self.seqs = {
+            "NC_000001.11": "".join(rng.choice("ACGT") for _ in range(10000)),
+            "NM_000001.1": "".join(rng.choice("ACGT") for _ in range(2000)),
+        }
+        self.fetcher = _CountingFetcher(self.seqs)
+
+    def test_slices_match(self):
+        rng = random.Random(1)
+        requests = []
+        for _ in range(200):
+            ac = rng.choice(sorted(self.seqs))
+            start_i = rng.randrange(0, 10500)
+            end_i = rng.choice([None, start_i + rng.randrange(0, 200)])
+            requests.append((ac, start_i, end_i))
+        requests.append(("NM_000001.1", None, None))
+        self.assertEqual([self.seqs[ac][s:e] for ac, s, e in requests], fetch_seqs(self.fetcher, requests))
+
+    def test_overlapping_ranges_coalesced(self):
+        requests = [
+            ("NC_000001.11", 100, 200),
+            ("NM_000001.1", 0, 10),
+            ("NC_000001.11", 150, 250),
+            ("NC_000001.11", 250, 300),
+            ("NC_000001.11", 500, 510),
+            ("NC_000001.11", 120, 130),
+        ]
+        fetch_seqs(self.fetcher, requests)
+        self.assertEqual([("NC_000001.11", 100, 300), ("NC_000001.11", 500, 510), ("NM_000001.1", 0, 10)],
+                         self.fetcher.calls)
+
+    def test_empty(self):
+        self.assertEqual([], fetch_seqs(self.fetcher, []))
+        self.assertEqual([], self.fetcher.calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# <LICENSE>
+# Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# </LICENSE>
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import random
+import re
+import shutil
+import struct
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import pytest
+
+from vvhgvs.dataproviders.seqfile import FastaFile, SeqFiles, TwoBitFile
+
+data_dir = os.path.join(os.path.dirname(__file__), "data", "sample_data")
+rna_fn = os.path.join(data_dir, "f2.human.rna.small.fna")
+genomic_fn = os.path.join(data_dir, "f3.refseqgene4.genomic.small.fna")
+
+
+def _read_fasta(path):
+    seqs = {}
+    with open(path) as f:
+        for line in f:
+            if line.startswith(">"):
+                name = line[1:].split()[0]
+                seqs[name] = []
+            else:
+                seqs[name].append(line.strip())
+    return {name: "".join(lines) for name, lines in seqs.items()}
+
+
+def _write_2bit(path, seqs):
+    """writes seqs (name -> sequence) as a version 0 2bit file, with N runs as N blocks"""
+    codes = {"T": 0, "C": 1, "A": 2, "G": 3}
+    records = []
+    for name, seq in seqs.items():
+        n_blocks = [(m.start(), m.end() - m.start()) for m in re.finditer("N+", seq)]
+        padded = seq.replace("N", "T") + "T" * (-len(seq) % 4)
+        packed = bytearray(
+            codes[padded[i]] << 6 | codes[padded[i + 1]] << 4 | codes[padded[i + 2]] << 2 | codes[padded[i + 3]]
+            for i in range(0, len(padded), 4))
+        rec = struct.pack("<II", len(seq), len(n_blocks))
+        rec += struct.pack("<{}I".format(len(n_blocks)), *[s for s, _ in n_blocks])
+        rec += struct.pack("<{}I".format(len(n_blocks)), *[n for _, n in n_blocks])
+        rec += struct.pack("<II", 0, 0) + bytes(packed)
+        records.append((name.encode("ascii"), rec))
+
+    offset = 16 + sum(1 + len(name) + 4 for name, _ in records)
+    with open(path, "wb") as f:
+        f.write(struct.pack("<IIII", 0x1A412743, 0, len(records), 0))
+        for name, rec in records:
+            f.write(struct.pack("<B", len(name)) + name + struct.pack("<I", offset))
+            offset += len(rec)
+        for _, rec in records:
+            f.write(rec)
+
+
+def _random_slices(seqs, n=300):
+    rng = random.Random(0)
+    names = sorted(seqs)
+    for _ in range(n):
+        name = rng.choice(names)
+        start_i = rng.randrange(0, len(seqs[name]) + 10)
+        yield name, start_i, start_i + rng.randrange(0, 300)
+
+
+@pytest.mark.quick
+class Test_FastaFile(unittest.TestCase):
+    def setUp(self):
+        self.seqs = _read_fasta(genomic_fn)
+        self.ff = FastaFile(genomic_fn)
+
+    def tearDown(self):
+        self.ff.close()
+
+    def test_slices_match(self):
+        for name, start_i, end_i in _random_slices(self.seqs):
+            self.assertEqual(self.seqs[name][start_i:end_i], self.ff.fetch(name, start_i, end_i))
+
+    def test_whole_sequence(self):
+        for name, seq in self.seqs.items():
+            self.assertEqual(seq, self.ff.fetch(name))
+
+    def test_accession_alias(self):
+        ff = FastaFile(rna_fn)
+        self.assertIn("NM_001005405.2", ff)
+        self.assertEqual("TGCTCCTCTA", ff.fetch("NM_001005405.2", 0, 10))
+        self.assertEqual(ff.fetch("gi|123173798|ref|NM_001005405.2|"), ff.fetch("NM_001005405.2"))
+        with self.assertRaises(KeyError):
+            ff.fetch("NM_999999.9")
+        ff.close()
+
+    def test_bgzip(self):
+        pysam = pytest.importorskip("pysam")
+        tmpdir = tempfile.mkdtemp()
+        try:
+            gz_fn = os.path.join(tmpdir, "rna.fna.gz")
+            pysam.tabix_compress(rna_fn, gz_fn)
+            pysam.faidx(gz_fn)
+            ff = FastaFile(gz_fn)
+            expected = _read_fasta(rna_fn)
+            for name, start_i, end_i in _random_slices(expected, 50):
+                self.assertEqual(expected[name][start_i:end_i], ff.fetch(name, start_i, end_i))
+            ff.close()
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_bgzip_without_pysam(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            gz_fn = os.path.join(tmpdir, "rna.fna.gz")
+            with open(gz_fn, "wb") as f:
+                f.write(b"\x1f\x8b")
+            with open(gz_fn + ".fai", "w") as f:
+                f.write("NM_01.1\t10\t8\t10\t11\n")
+            with mock.patch.dict(sys.modules, {"pysam": None}):
+                with self.assertRaisesRegex(RuntimeError, "requires pysam"):
+                    FastaFile(gz_fn)
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+@pytest.mark.quick
+class Test_TwoBitFile(unittest.TestCase):
+    def setUp(self):
+        seqs = _read_fasta(rna_fn)
+        seqs["NC_000099.1"] = "NNNN" + seqs["gi|52317161|ref|NM_001004713.1|"][:501] + "N" * 37 + "ACGTA" + "NN"
+        self.seqs = seqs
+        self.tmpdir = tempfile.mkdtemp()
+        self.fn = os.path.join(self.tmpdir, "seqs.2bit")
+        _write_2bit(self.fn, seqs)
+        self.tbf = TwoBitFile(self.fn)
+
+    def tearDown(self):
+        self.tbf.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_slices_match(self):
+        for name, start_i, end_i in _random_slices(self.seqs, 1000):
+            self.assertEqual(self.seqs[name][start_i:end_i], self.tbf.fetch(name, start_i, end_i))
+
+    def test_whole_sequence(self):
+        for name, seq in self.seqs.items():
+            self.assertEqual(seq, self.tbf.fetch(name))
+        self.assertEqual(self.seqs["gi|123173798|ref|NM_001005405.2|"], self.tbf.fetch("NM_001005405.2"))
+
+    def test_seqfiles(self):
+        sfs = SeqFiles([self.fn, genomic_fn])
+        self.assertEqual(self.seqs["NC_000099.1"][:10], sfs.fetch("NC_000099.1", 0, 10))
+        self.assertEqual(_read_fasta(genomic_fn)["gi|296923737|ref|NG_021245.2|"][100:110],
+                         sfs.fetch("NG_021245.2", 100, 110))
+        with self.assertRaises(KeyError):
+            sfs.fetch("NM_999999.9")
+        sfs.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# <LICENSE>
+# Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# </LICENSE>
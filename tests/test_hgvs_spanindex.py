@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import random
+import unittest
+
+import pytest
+
+from vvhgvs.utils.spanindex import SpanIndex
+
+
+@pytest.mark.quick
+class Test_SpanIndex(unittest.TestCase):
+    def test_empty(self):
+        si = SpanIndex([])
+        self.assertEqual(0, len(si))
+        self.assertEqual([], si.overlapping(0, 100))
+
+    def test_nested(self):
+        # a long span hides shorter spans' ends from the prefix maximum
+        si = SpanIndex([(0, 1000, "long"), (10, 20, "a"), (30, 40, "b"), (900, 950, "c")])
+        self.assertEqual(["long", "b"], si.overlapping(35, 36))
+        self.assertEqual(["long", "a"], si.overlapping(20, 21))
+        self.assertEqual([], si.overlapping(1001, 2000))
+
+    def test_random(self):
+        rng = random.Random(0)
+        spans = []
+        for i in range(500):
+            start = rng.randint(0, 100000)
+            spans.append((start, start + rng.choice([0, 10, 1000, 20000]), i))
+        si = SpanIndex(spans)
+        for _ in range(500):
+            start = rng.randint(-100, 120000)
+            end = start + rng.choice([0, 1, 50, 5000])
+            expected = sorted(v for s, e, v in spans if s < end and start <= e)
+            self.assertEqual(expected, sorted(si.overlapping(start, end)))
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# <LICENSE>
+# Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# </LICENSE>
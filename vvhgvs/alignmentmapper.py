@@ -3,16 +3,27 @@
 
 The AlignmentMapper class is at the heart of mapping between aligned sequences.
 
+Besides the interval methods (g_to_n, n_to_c, etc.), AlignmentMapper
+provides *_array methods that map NumPy arrays of positions at once,
+for bulk conversion of many positions on one transcript.  Bases,
+offsets and data (as Datum values) are passed and returned as separate
+integer arrays; for each element, the result is the start (or, with
+base="end", the end) of the interval that the interval method returns
+for that single position.
+
 """
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
-import re
+from bisect import bisect_right
+
+import numpy as np
 from six.moves import range
 from bioutils.coordinates import strand_int_to_pm
 
 import vvhgvs.location
 
+from vvhgvs.compiledalignment import get_compiled_alignment, parse_cigar
 from vvhgvs.exceptions import HGVSError, HGVSUsageError, HGVSDataNotAvailableError, HGVSInvalidIntervalError
 from vvhgvs.utils import build_tx_cigar
 from vvhgvs.enums import Datum
@@ -29,12 +40,13 @@ class AlignmentMapper(object):
 
     """
     __slots__ = ("tx_ac", "alt_ac", "alt_aln_method", "strand", "gc_offset", "cds_start_i", "cds_end_i", "tgt_len",
-                 "cigar", "ref_pos", "tgt_pos", "cigar_op")
+                 "cigar", "ref_pos", "tgt_pos", "cigar_op", "_arrays")
 
     def __init__(self, hdp, tx_ac, alt_ac, alt_aln_method):
         self.tx_ac = tx_ac
         self.alt_ac = alt_ac
         self.alt_aln_method = alt_aln_method
+        self._arrays = None
         if self.alt_aln_method != "transcript":
             tx_info = hdp.get_tx_info(self.tx_ac, self.alt_ac, self.alt_aln_method)
             if tx_info is None:
@@ -44,8 +56,8 @@ class AlignmentMapper(object):
 
             #tx_exons = hdp.get_tx_exons(self.tx_ac, self.alt_ac, self.alt_aln_method)
             # now pre filtered, exons must be adjacent within transcript
-            tx_exons = hdp.get_agg_exon_aln(self.tx_ac, self.alt_ac, self.alt_aln_method)
-            if tx_exons is None:
+            aln = get_compiled_alignment(hdp, self.tx_ac, self.alt_ac, self.alt_aln_method)
+            if aln is None:
                 tx_info = hdp.get_tx_info(self.tx_ac, self.alt_ac, self.alt_aln_method)
                 if tx_info is None:
                     raise HGVSDataNotAvailableError("AlignmentMapper(tx_ac={self.tx_ac}, "
@@ -54,13 +66,7 @@ class AlignmentMapper(object):
                     "alt_ac={self.alt_ac}, alt_aln_method={self.alt_aln_method}): "
                     "No transcript exons".format(self=self))
 
-            self.strand = tx_exons["alt_strand"]
-            self.gc_offset = tx_exons["mapped_start"]
-            self.cds_start_i = tx_exons["cds_start_i"]
-            self.cds_end_i = tx_exons["cds_end_i"]
-            self.cigar = tx_exons['not_quite_cigar']
-            self.ref_pos, self.tgt_pos, self.cigar_op = self._parse_cigar(self.cigar)
-            self.tgt_len = self.tgt_pos[-1]
+            self._set_alignment(aln)
         else:
             # this covers the identity cases n <-> c
             tx_identity_info = hdp.get_tx_limits(self.tx_ac)
@@ -75,6 +81,31 @@ class AlignmentMapper(object):
         assert not ((self.cds_start_i is None) ^
                     (self.cds_end_i is None)), "CDS start and end must both be defined or neither defined"
 
+    @classmethod
+    def from_compiled_alignment(cls, aln):
+        """returns an AlignmentMapper for a
+        :class:`vvhgvs.compiledalignment.CompiledAlignment`, without a
+        data provider"""
+        am = cls.__new__(cls)
+        am.tx_ac = aln.tx_ac
+        am.alt_ac = aln.alt_ac
+        am.alt_aln_method = aln.alt_aln_method
+        am._arrays = None
+        am._set_alignment(aln)
+        return am
+
+    def _set_alignment(self, aln):
+        self.strand = aln.strand
+        self.gc_offset = aln.gc_offset
+        self.cds_start_i = aln.cds_start_i
+        self.cds_end_i = aln.cds_end_i
+        self.cigar = aln.cigar
+        # lists, which bisect faster than arrays
+        self.ref_pos = aln.ref_pos.tolist()
+        self.tgt_pos = aln.tgt_pos.tolist()
+        self.cigar_op = list(aln.ops.decode("ascii"))
+        self.tgt_len = aln.tgt_len
+
     def __str__(self):
         return "{self.__class__.__name__}: {self.tx_ac} ~ {self.alt_ac} ~ {self.alt_aln_method}; " \
                "{strand_pm} strand; offset={self.gc_offset}".format(
@@ -84,33 +115,16 @@ class AlignmentMapper(object):
         """For a given CIGAR string, return the start positions of
         each aligned segment in ref and tgt, and a list of CIGAR operators.
         """
-        cigar_re = re.compile(r"(?P<len>\d+)(?P<op>[=DIMNX])")
-        ces = [m.groupdict() for m in cigar_re.finditer(cigar)]
-        ref_pos = [None] * len(ces)
-        tgt_pos = [None] * len(ces)
-        cigar_op = [None] * len(ces)
-        ref_cur = tgt_cur = 0
-        for i, ce in enumerate(ces):
-            ref_pos[i] = ref_cur
-            tgt_pos[i] = tgt_cur
-            cigar_op[i] = ce["op"]
-            step = int(ce["len"])
-            if ce["op"] in "=MINX":
-                ref_cur += step
-            if ce["op"] in "=MDX":
-                tgt_cur += step
-        ref_pos.append(ref_cur)
-        tgt_pos.append(tgt_cur)
-        return ref_pos, tgt_pos, cigar_op
+        return parse_cigar(cigar)
 
     def _map(self, from_pos, to_pos, pos, base):
         """Map position between aligned sequences
 
-        Positions in this function are 0-based.
+        Positions in this function are 0-based.  from_pos is
+        non-decreasing, so the segment containing pos (the last one that
+        starts at or before it) is found by bisection.
         """
-        pos_i = -1
-        while pos_i < len(self.cigar_op) and pos >= from_pos[pos_i + 1]:
-            pos_i += 1
+        pos_i = bisect_right(from_pos, pos) - 1
 
         if pos_i == -1 or pos_i == len(self.cigar_op):
             raise HGVSInvalidIntervalError("Position is beyond the bounds of transcript record")
@@ -251,6 +265,113 @@ class AlignmentMapper(object):
         """convert a transcript CDS (c.) interval to a genomic (g.) interval"""
         return self.n_to_g(self.c_to_n(c_interval))
 
+    # array methods; see module documentation
+
+    _OP_MATCH, _OP_GAP, _OP_INTRON = 0, 1, 2
+
+    def _get_arrays(self):
+        """returns ref_pos, tgt_pos and cigar_op as NumPy arrays, with
+        operations coded as _OP_MATCH, _OP_GAP or _OP_INTRON"""
+        if self._arrays is None:
+            op_codes = {"=": self._OP_MATCH, "M": self._OP_MATCH, "X": self._OP_MATCH,
+                        "D": self._OP_GAP, "I": self._OP_GAP, "N": self._OP_INTRON}
+            self._arrays = (np.array(self.ref_pos, dtype=np.int64),
+                            np.array(self.tgt_pos, dtype=np.int64),
+                            np.array([op_codes[op] for op in self.cigar_op], dtype=np.int8))
+        return self._arrays
+
+    def _map_array(self, from_pos, to_pos, pos, base):
+        """array equivalent of _map; returns mapped positions and offsets"""
+        ops = self._get_arrays()[2]
+        pos_i = np.searchsorted(from_pos, pos, side="right") - 1
+        if np.any((pos_i < 0) | (pos_i >= len(ops))):
+            raise HGVSInvalidIntervalError("Position is beyond the bounds of transcript record")
+        op = ops[pos_i]
+        seg_start, seg_end, to_start = from_pos[pos_i], from_pos[pos_i + 1], to_pos[pos_i]
+
+        mapped_pos = to_start + (pos - seg_start)
+        mapped_pos_offset = np.zeros_like(pos)
+
+        gap = op == self._OP_GAP
+        mapped_pos[gap] = to_start[gap] - 1 if base == "start" else to_start[gap]
+
+        intron = op == self._OP_INTRON
+        to_left = intron & (pos - seg_start + 1 <= seg_end - pos)
+        to_right = intron & ~to_left
+        mapped_pos[to_left] = to_start[to_left] - 1
+        mapped_pos_offset[to_left] = (pos - seg_start + 1)[to_left]
+        mapped_pos[to_right] = to_start[to_right]
+        mapped_pos_offset[to_right] = -(seg_end - pos)[to_right]
+        return mapped_pos, mapped_pos_offset
+
+    def g_to_n_array(self, g_pos, base="start"):
+        """convert an array of genomic (g.) positions to arrays of
+        transcript cDNA (n.) bases and offsets"""
+        ref_pos, tgt_pos, _ = self._get_arrays()
+        pos = np.asarray(g_pos, dtype=np.int64) - 1 - self.gc_offset
+        if self.strand == -1:
+            n, offset = self._map_array(ref_pos, tgt_pos, pos, "end" if base == "start" else "start")
+            return self.tgt_len - n, -offset
+        n, offset = self._map_array(ref_pos, tgt_pos, pos, base)
+        return n + 1, offset
+
+    def n_to_g_array(self, n_base, n_offset=None, base="start"):
+        """convert arrays of transcript cDNA (n.) bases and offsets to an
+        array of genomic (g.) positions"""
+        ref_pos, tgt_pos, _ = self._get_arrays()
+        n_base = np.asarray(n_base, dtype=np.int64)
+        n_offset = np.zeros_like(n_base) if n_offset is None else np.asarray(n_offset, dtype=np.int64)
+        if self.strand == -1:
+            pos, n_offset = self.tgt_len - n_base, -n_offset
+        else:
+            pos = n_base - 1
+        g, _ = self._map_array(tgt_pos, ref_pos, pos, base)
+        return g + self.gc_offset + 1 + n_offset
+
+    def n_to_c_array(self, n_base):
+        """convert an array of transcript cDNA (n.) bases to arrays of
+        transcript CDS (c.) bases and data; offsets are unchanged"""
+        if self.cds_start_i is None:
+            raise HGVSUsageError(
+                "CDS is undefined for {self.tx_ac}; cannot map to c. coordinate (non-coding transcript?)".format(
+                    self=self))
+        n_base = np.asarray(n_base, dtype=np.int64)
+        if np.any((n_base <= 0) | (n_base > self.tgt_len)):
+            raise HGVSInvalidIntervalError("The given coordinate is outside the bounds of the reference sequence.")
+        c_base = np.where(n_base <= self.cds_start_i, n_base - (self.cds_start_i + 1),
+                          np.where(n_base <= self.cds_end_i, n_base - self.cds_start_i, n_base - self.cds_end_i))
+        c_datum = np.where(n_base <= self.cds_end_i, Datum.CDS_START.value, Datum.CDS_END.value)
+        return c_base, c_datum
+
+    def c_to_n_array(self, c_base, c_datum):
+        """convert arrays of transcript CDS (c.) bases and data to an
+        array of transcript cDNA (n.) bases; offsets are unchanged"""
+        if self.cds_start_i is None:
+            raise HGVSUsageError(
+                "CDS is undefined for {self.tx_ac}; cannot map from c. coordinate (non-coding transcript?)".format(
+                    self=self))
+        c_base = np.asarray(c_base, dtype=np.int64)
+        cds_end = np.asarray(c_datum) == Datum.CDS_END.value
+        if np.any(~cds_end & (c_base == 0)):
+            raise HGVSInvalidIntervalError("c.0 is not a valid position")
+        n_base = np.where(cds_end, c_base + self.cds_end_i,
+                          np.where(c_base < 0, c_base + self.cds_start_i + 1, c_base + self.cds_start_i))
+        if np.any((n_base <= 0) | (n_base > self.tgt_len)):
+            raise HGVSInvalidIntervalError("The given coordinate is outside the bounds of the reference sequence.")
+        return n_base
+
+    def g_to_c_array(self, g_pos, base="start"):
+        """convert an array of genomic (g.) positions to arrays of
+        transcript CDS (c.) bases, offsets and data"""
+        n_base, offset = self.g_to_n_array(g_pos, base)
+        c_base, c_datum = self.n_to_c_array(n_base)
+        return c_base, offset, c_datum
+
+    def c_to_g_array(self, c_base, c_offset, c_datum, base="start"):
+        """convert arrays of transcript CDS (c.) bases, offsets and data to
+        an array of genomic (g.) positions"""
+        return self.n_to_g_array(self.c_to_n_array(c_base, c_datum), c_offset, base)
+
     @property
     def is_coding_transcript(self):
         if ((self.cds_start_i is not None) ^ (self.cds_end_i is not None)):
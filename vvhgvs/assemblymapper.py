@@ -150,6 +150,15 @@ class AssemblyMapper(VariantMapper):
                                         var_g.posedit.pos.end.base)
         return [e["tx_ac"] for e in tx]
 
+    def prefetch_region(self, alt_ac, start, end):
+        return super(AssemblyMapper, self).prefetch_region(alt_ac, start, end, alt_aln_method=self.alt_aln_method)
+
+    async def t_to_p_async(self, var_t):
+        return await self._run_async(self.t_to_p, var_t)
+
+    async def relevant_transcripts_async(self, var_g):
+        return await self._run_async(self.relevant_transcripts, var_g)
+
     def _alt_ac_for_tx_ac(self, tx_ac):
         """return chromosomal accession for given transcript accession (and
         the_assembly and aln_method setting used to instantiate this
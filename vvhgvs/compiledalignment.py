@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""compiled transcript-to-reference alignments
+
+A CompiledAlignment holds what the mappers need from an aligned
+transcript (the get_agg_exon_aln row): strand, offset, CDS bounds and
+the CIGAR string, parsed into arrays of segment breakpoints and
+operations.  It is built
+once per (tx_ac, alt_ac, alt_aln_method) by
+:meth:`vvhgvs.dataproviders.interface.Interface.get_compiled_alignment`
+and shared by every mapper constructed for that alignment.  The
+mappers compile get_agg_exon_aln themselves, uncached, for data
+providers without get_compiled_alignment (see get_compiled_alignment
+below).
+
+Records are immutable.  They pickle as a few small arrays, and
+to_bytes() writes a flat layout that from_buffer() reads without
+copying.  A file of records can therefore be memory-mapped and shared
+between processes.  A record is valid for the data version of the
+provider it came from; stores shared across versions should include
+the data version in their keys.
+
+>>> aln = CompiledAlignment.from_cigar("NM_01.1", "NC_01.1", "splign", 1, 1000, 5, 25, "10=20N5=2D3=1I4=")
+>>> aln.ref_pos.tolist(), aln.tgt_pos.tolist(), aln.ops
+([0, 10, 30, 35, 35, 38, 39, 43], [0, 10, 10, 15, 17, 20, 20, 24], b'=N=D=I=')
+>>> CompiledAlignment.from_buffer(aln.to_bytes()) == aln
+True
+
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+import re
+import struct
+
+import numpy as np
+
+_cigar_re = re.compile(r"(?P<len>\d+)(?P<op>[=DIMNX])")
+_header_len = struct.Struct("<I")
+
+
+def parse_cigar(cigar):
+    """For a given CIGAR string, return the start positions of
+    each aligned segment in ref and tgt, and a list of CIGAR operators.
+    Each position list ends with the length of its sequence.
+    """
+    ces = [m.groupdict() for m in _cigar_re.finditer(cigar)]
+    ref_pos = [None] * len(ces)
+    tgt_pos = [None] * len(ces)
+    cigar_op = [None] * len(ces)
+    ref_cur = tgt_cur = 0
+    for i, ce in enumerate(ces):
+        ref_pos[i] = ref_cur
+        tgt_pos[i] = tgt_cur
+        cigar_op[i] = ce["op"]
+        step = int(ce["len"])
+        if ce["op"] in "=MINX":
+            ref_cur += step
+        if ce["op"] in "=MDX":
+            tgt_cur += step
+    ref_pos.append(ref_cur)
+    tgt_pos.append(tgt_cur)
+    return ref_pos, tgt_pos, cigar_op
+
+
+def _is_readonly_array(a):
+    return isinstance(a, np.ndarray) and a.dtype == np.dtype("<i8") and not a.flags.writeable
+
+
+def _readonly_array(values):
+    a = np.array(values, dtype="<i8")
+    a.flags.writeable = False
+    return a
+
+
+class CompiledAlignment(object):
+    """immutable alignment record; see module documentation
+
+    ref_pos and tgt_pos are read-only int64 arrays of the start of each
+    CIGAR segment in the reference (alt_ac) and transcript, each
+    followed by the sequence length; ops is a bytes string of the
+    operations, one per segment.
+    """
+
+    __slots__ = ("tx_ac", "alt_ac", "alt_aln_method", "strand", "gc_offset", "cds_start_i", "cds_end_i", "cigar",
+                 "ref_pos", "tgt_pos", "ops")
+
+    def __init__(self, tx_ac, alt_ac, alt_aln_method, strand, gc_offset, cds_start_i, cds_end_i, cigar, ref_pos,
+                 tgt_pos, ops):
+        ref_pos = ref_pos if _is_readonly_array(ref_pos) else _readonly_array(ref_pos)
+        tgt_pos = tgt_pos if _is_readonly_array(tgt_pos) else _readonly_array(tgt_pos)
+        if not (len(ref_pos) == len(tgt_pos) == len(ops) + 1):
+            raise ValueError("ref_pos and tgt_pos must each have one more element than ops")
+        for name, value in (("tx_ac", tx_ac), ("alt_ac", alt_ac), ("alt_aln_method", alt_aln_method),
+                            ("strand", strand), ("gc_offset", gc_offset), ("cds_start_i", cds_start_i),
+                            ("cds_end_i", cds_end_i), ("cigar", cigar), ("ref_pos", ref_pos),
+                            ("tgt_pos", tgt_pos), ("ops", bytes(ops))):
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_cigar(cls, tx_ac, alt_ac, alt_aln_method, strand, gc_offset, cds_start_i, cds_end_i, cigar):
+        ref_pos, tgt_pos, cigar_op = parse_cigar(cigar)
+        return cls(tx_ac, alt_ac, alt_aln_method, strand, gc_offset, cds_start_i, cds_end_i, cigar, ref_pos, tgt_pos,
+                   "".join(cigar_op).encode("ascii"))
+
+    @classmethod
+    def from_agg_exon_aln(cls, tx_ac, alt_ac, alt_aln_method, agg_exon_aln):
+        """returns a CompiledAlignment of a get_agg_exon_aln result"""
+        return cls.from_cigar(tx_ac, alt_ac, alt_aln_method, agg_exon_aln["alt_strand"], agg_exon_aln["mapped_start"],
+                              agg_exon_aln["cds_start_i"], agg_exon_aln["cds_end_i"], agg_exon_aln["not_quite_cigar"])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledAlignment is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("CompiledAlignment is immutable")
+
+    def __reduce__(self):
+        return (CompiledAlignment, self._fields())
+
+    def __eq__(self, other):
+        if not isinstance(other, CompiledAlignment):
+            return NotImplemented
+        return all(a == b if not isinstance(a, np.ndarray) else np.array_equal(a, b)
+                   for a, b in zip(self._fields(), other._fields()))
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    __hash__ = None
+
+    def __repr__(self):
+        return ("{self.__class__.__name__}({self.tx_ac}, {self.alt_ac}, {self.alt_aln_method}; "
+                "{n} segments)".format(self=self, n=len(self.ops)))
+
+    def _fields(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    @property
+    def ref_len(self):
+        return int(self.ref_pos[-1])
+
+    @property
+    def tgt_len(self):
+        return int(self.tgt_pos[-1])
+
+    def to_bytes(self):
+        """returns the record in the flat layout read by from_buffer: a
+        4-byte header length, a JSON header padded to a multiple of 8
+        bytes, the ref_pos and tgt_pos arrays as little-endian int64, and
+        ops"""
+        header = json.dumps([self.tx_ac, self.alt_ac, self.alt_aln_method, self.strand, self.gc_offset,
+                             self.cds_start_i, self.cds_end_i, self.cigar, len(self.ops)]).encode("utf-8")
+        header += b" " * (-(_header_len.size + len(header)) % 8)
+        return b"".join([_header_len.pack(len(header)), header, self.ref_pos.tobytes(), self.tgt_pos.tobytes(),
+                         self.ops])
+
+    @classmethod
+    def from_buffer(cls, buffer, offset=0):
+        """returns the record written by to_bytes() at offset in buffer
+        (e.g., bytes or an mmap); the arrays are views of buffer, not
+        copies"""
+        (header_len, ) = _header_len.unpack_from(buffer, offset)
+        offset += _header_len.size
+        header = bytes(buffer[offset:offset + header_len])
+        tx_ac, alt_ac, alt_aln_method, strand, gc_offset, cds_start_i, cds_end_i, cigar, n_ops = json.loads(
+            header.decode("utf-8"))
+        offset += header_len
+        ref_pos = np.frombuffer(buffer, dtype="<i8", count=n_ops + 1, offset=offset)
+        offset += ref_pos.nbytes
+        tgt_pos = np.frombuffer(buffer, dtype="<i8", count=n_ops + 1, offset=offset)
+        offset += tgt_pos.nbytes
+        ops = bytes(buffer[offset:offset + n_ops])
+        if ref_pos.flags.writeable:
+            ref_pos.flags.writeable = tgt_pos.flags.writeable = False
+        return cls(tx_ac, alt_ac, alt_aln_method, strand, gc_offset, cds_start_i, cds_end_i, cigar, ref_pos, tgt_pos,
+                   ops)
+
+
+def get_compiled_alignment(hdp, tx_ac, alt_ac, alt_aln_method):
+    """returns hdp.get_compiled_alignment(tx_ac, alt_ac, alt_aln_method),
+    or, if hdp does not provide that method, a CompiledAlignment of
+    hdp.get_agg_exon_aln(tx_ac, alt_ac, alt_aln_method); None if there
+    is no alignment"""
+    try:
+        get = hdp.get_compiled_alignment
+    except AttributeError:
+        agg_exon_aln = hdp.get_agg_exon_aln(tx_ac, alt_ac, alt_aln_method)
+        if agg_exon_aln is None:
+            return None
+        return CompiledAlignment.from_agg_exon_aln(tx_ac, alt_ac, alt_aln_method, agg_exon_aln)
+    return get(tx_ac, alt_ac, alt_aln_method)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
+
+# <LICENSE>
+# Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# </LICENSE>
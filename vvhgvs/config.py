@@ -85,6 +85,9 @@ class ConfigGroup(object):
     def __dir__(self):
         return list(self.__dict__["_section"].keys())
 
+    def __contains__(self, k):
+        return k in self.__dict__["_section"]
+
     def __getattr__(self, k):
         return _val_xform(self.__dict__["_section"][k])
 
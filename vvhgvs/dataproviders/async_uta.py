@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""asyncio data provider for UTA, using asyncpg
+
+AsyncUTA implements the ordinary (synchronous) provider interface, so
+that the mappers, normalizer and validator can use it unchanged, but it
+never blocks: a method that needs data that has not been fetched raises
+:class:`vvhgvs.exceptions.HGVSDataPending`.  The awaitable
+AsyncUTA.resolve(exc) fetches that data (queries through an asyncpg
+connection pool; sequences in a thread) and the caller retries.
+:meth:`vvhgvs.variantmapper.VariantMapper.g_to_c_async` and the other
+``*_async`` mapper methods do this, so one event loop can keep many
+mappings in flight::
+
+    hdp = await vvhgvs.dataproviders.async_uta.connect()
+    am = vvhgvs.assemblymapper.AssemblyMapper(hdp)
+    var_c = await am.g_to_c_async(var_g, "NM_000551.3")
+
+Provider methods have awaitable versions with an ``_async`` suffix,
+e.g. ``await hdp.get_tx_info_async(tx_ac, alt_ac, alt_aln_method)``;
+hdp.call(fn, *args) awaits any function that uses the provider.
+
+A synchronous method stops at the first datum it lacks, so hdp.call
+fetches one datum at a time and reruns the whole method (including
+validation, fill_ref and normalization) after each fetch.  A call that
+needs k uncached data therefore makes k sequential round trips and
+does the work of up to k + 1 partial runs.  Concurrency comes from
+keeping many calls in flight, not from overlapping the fetches of one
+call.  To avoid the reruns, load the data beforehand, e.g. with
+``await hdp.call(vm.prefetch_region, alt_ac, start_i, end_i)`` or the
+batch methods (get_tx_info_batch, etc.).
+
+Query results are kept in a bounded store until they are needed again;
+the results of provider methods are cached by the usual lru caches.
+
+asyncpg is an optional dependency (``pip install vvhgvs[async]``).
+
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import asyncio
+import inspect
+import logging
+import os
+from collections import OrderedDict
+
+import vvhgvs
+from ..exceptions import HGVSDataPending
+from .interface import Interface
+from .rows import row_class
+from .uta import UTABase, _get_uta_db_url, _parse_url, _positional_params
+
+_logger = logging.getLogger(__name__)
+
+
+def _hashable(args):
+    return tuple(tuple(a) if isinstance(a, list) else a for a in args)
+
+
+def _search_path_hooks(schema):
+    """returns asyncpg pool init and reset functions that set the
+    search_path of each connection to schema
+
+    A SET statement is used rather than the search_path startup
+    parameter, which connection poolers such as pgbouncer reject or
+    ignore.  The pool resets each released connection with RESET ALL,
+    which also resets search_path, so reset restores it in the same
+    round trip.
+    """
+    sql = 'set search_path = "{}";'.format(schema.replace('"', '""'))
+
+    async def init(conn):
+        await conn.execute(sql)
+
+    async def reset(conn):
+        await conn.execute(conn.get_reset_query() + "\n" + sql)
+
+    return init, reset
+
+
+async def _query(pool, sql, args):
+    """runs psycopg2-style sql with args on a pooled connection and
+    returns the result as a list of Rows"""
+    async with pool.acquire() as conn:
+        records = await conn.fetch(_positional_params(sql), *[list(a) if isinstance(a, tuple) else a for a in args])
+    if not records:
+        return []
+    cls = row_class(records[0].keys())
+    return [cls(tuple(r.values())) for r in records]
+
+
+class AsyncUTA(UTABase):
+    """UTA data provider whose data are fetched asynchronously; see the
+    module documentation.  Use connect() to create instances."""
+
+    def __init__(self, url, pool, application_name=None, mode=None, cache=None, results_maxsize=10000, results=None,
+                 span_index=None, alias_index=None):
+        self.application_name = application_name
+        self._pool = pool
+        # fetch key -> rows or sequence, in LRU order; results gives initial contents
+        self._results = OrderedDict(results or ())
+        self._results_maxsize = results_maxsize
+        self._inflight = {}    # fetch key -> future, so that concurrent requests share a fetch
+        super(AsyncUTA, self).__init__(url, mode, cache, span_index, alias_index)
+
+    def _connect(self):
+        pass    # the pool is created by connect()
+
+    def close(self):
+        pass    # see aclose()
+
+    async def aclose(self):
+        await self._pool.close()
+
+    ############################################################################
+    # synchronous access to fetched data
+
+    def _get_result(self, key):
+        try:
+            result = self._results[key]
+        except KeyError:
+            raise HGVSDataPending(key)
+        self._results.move_to_end(key)
+        return result
+
+    def _fetchone(self, sql, *args):
+        rows = self._get_result(("sql", sql, _hashable(args[0] if args else ())))
+        return rows[0] if rows else None
+
+    def _fetchall(self, sql, *args):
+        return self._get_result(("sql", sql, _hashable(args[0] if args else ())))
+
+    def get_seq(self, ac, start_i=None, end_i=None):
+        return self._get_result(("seq", ac, start_i, end_i))
+
+    def get_seqs(self, requests):
+        return [self.get_seq(*r) for r in requests]
+
+    ############################################################################
+    # asynchronous fetching
+
+    async def resolve(self, pending):
+        """fetches the data for HGVSDataPending exception pending"""
+        key = pending.key
+        if key in self._results:
+            return
+        fut = self._inflight.get(key)
+        if fut is not None:
+            await fut
+            return
+        fut = self._inflight[key] = asyncio.get_event_loop().create_future()
+        try:
+            if key[0] == "sql":
+                result = await _query(self._pool, key[1], key[2])
+            else:
+                result = await asyncio.get_event_loop().run_in_executor(None, self.seqfetcher.fetch_seq, *key[1:])
+            self._results[key] = result
+            while len(self._results) > self._results_maxsize:
+                self._results.popitem(last=False)
+            fut.set_result(None)
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()    # mark retrieved; the exception is raised below
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def call(self, fn, *args, **kwargs):
+        """calls fn(*args, **kwargs), awaiting data fetches until it returns"""
+        while True:
+            try:
+                return fn(*args, **kwargs)
+            except HGVSDataPending as e:
+                await self.resolve(e)
+
+
+def _async_method(name):
+    async def method(self, *args, **kwargs):
+        return await self.call(getattr(self, name), *args, **kwargs)
+
+    method.__name__ = str(name + "_async")
+    method.__doc__ = "awaitable {name}".format(name=name)
+    return method
+
+
+# awaitable versions of the provider interface methods, e.g. get_tx_info_async
+for _name in sorted(Interface.__abstractmethods__) + ["get_agg_exon_aln", "get_tx_limits", "get_seqs"]:
+    setattr(AsyncUTA, _name + "_async", _async_method(_name))
+
+
+async def connect(db_url=None,
+                  pool_min=vvhgvs.global_config.uta.pool_min,
+                  pool_max=vvhgvs.global_config.uta.pool_max,
+                  application_name=None,
+                  mode=None,
+                  cache=None,
+                  span_index=None,
+                  alias_index=None):
+    """Connect to a UTA database instance with an asyncpg connection pool
+    and return an AsyncUTA instance.  Arguments are as for
+    :func:`vvhgvs.dataproviders.uta.connect`.
+
+    """
+    import asyncpg
+
+    if db_url is None:
+        db_url = _get_uta_db_url()
+    url = _parse_url(db_url)
+    if url.scheme != 'postgresql':
+        raise RuntimeError("{url.scheme} in {url} is not currently supported".format(url=url))
+    if url.schema is None:
+        raise Exception("No schema name provided in {url}".format(url=url))
+    if application_name is None:
+        application_name = os.path.basename(inspect.stack()[-1][1])
+
+    init, reset = _search_path_hooks(url.schema)
+    pool = await asyncpg.create_pool(
+        host=url.hostname.replace('%2F', '/'),
+        port=url.port,
+        user=url.username,
+        password=url.password,
+        database=url.database,
+        min_size=pool_min,
+        max_size=pool_max,
+        server_settings={
+            "application_name": application_name + "/" + vvhgvs.__version__,
+        },
+        init=init,
+        reset=reset)
+
+    # the constructor checks the schema version, which must be fetched first
+    results = OrderedDict()
+    while True:
+        try:
+            hdp = AsyncUTA(url, pool, application_name=application_name, mode=mode, cache=cache, results=results,
+                           span_index=span_index, alias_index=alias_index)
+            break
+        except HGVSDataPending as e:
+            results[e.key] = await _query(pool, e.key[1], e.key[2])
+    _logger.info('connected to ' + str(db_url) + '...')
+    return hdp
+
+
+# <LICENSE>
+# Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# </LICENSE>
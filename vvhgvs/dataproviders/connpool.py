@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""bounded, thread-safe database connection pool
+
+Used by UTA_postgresql in place of psycopg2's ThreadedConnectionPool,
+which cannot wait for a free connection, cannot tell a broken
+connection from a working one, and is reset as a whole on any error.
+ConnectionPool:
+
+* opens at most maxconn connections; getconn() waits (up to timeout
+  seconds) for one to be returned when all are in use
+* checks that a connection that has been idle for check_idle seconds
+  is alive before handing it out, and replaces it if not
+* discards only connections returned as broken (putconn(conn,
+  broken=True)) or found closed or dead
+* serves waiting threads in order of arrival
+* records gauges and counters for sizing; see stats()
+
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import logging
+import threading
+import time
+from collections import deque
+
+import psycopg2
+
+from ..exceptions import HGVSError
+
+_logger = logging.getLogger(__name__)
+
+
+def _is_alive(conn):
+    """returns True if conn is open and answers a trivial query"""
+    if conn.closed:
+        return False
+    try:
+        with conn.cursor() as cur:
+            cur.execute("select 1")
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool(object):
+    """pool of connections made by calling connect(); see module
+    documentation"""
+
+    def __init__(self, connect, minconn, maxconn, timeout=None, check_idle=30, is_alive=_is_alive):
+        if maxconn < 1 or minconn > maxconn:
+            raise ValueError("pool bounds must satisfy 0 <= minconn <= maxconn and maxconn >= 1")
+        self._connect = connect
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.check_idle = check_idle
+        self._is_alive = is_alive
+        self._lock = threading.Lock()
+        self._idle = deque()    # (conn, time returned); most recently used at the right
+        self._n_open = 0    # idle + in use, including connections being opened
+        self._n_in_use = 0
+        self._waiters = deque()    # a Condition for each thread waiting in getconn, in arrival order
+        self._n_gets = 0
+        self._n_waits = 0
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._n_opened = 0
+        self._n_discarded = 0
+        self._closed = False
+        for _ in range(minconn):
+            conn = self._open()
+            self._idle.append((conn, time.time()))
+
+    def _available(self):
+        return bool(self._idle) or self._n_open < self.maxconn
+
+    def _wake(self):
+        # only the first waiter may take a connection; waking one thread
+        # at a time avoids a thundering herd
+        if self._waiters:
+            self._waiters[0].notify()
+
+    def _open(self):
+        conn = self._connect()
+        with self._lock:
+            self._n_open += 1
+            self._n_opened += 1
+        return conn
+
+    def _discard(self, conn):
+        """closes conn, which must be counted in _n_open, and wakes a waiter"""
+        _close_quietly(conn)
+        with self._lock:
+            self._n_open -= 1
+            self._n_discarded += 1
+            self._wake()
+
+    def getconn(self):
+        """returns a connection, waiting for one to become available if
+        maxconn are in use; raises HGVSError after timeout seconds.
+        Waiters are served in order of arrival."""
+        t0 = time.time()
+        with self._lock:
+            if self._closed:
+                raise HGVSError("connection pool is closed")
+            self._n_gets += 1
+            if self._waiters or not self._available():
+                waiter = threading.Condition(self._lock)
+                self._waiters.append(waiter)
+                try:
+                    while True:
+                        if self._closed:
+                            raise HGVSError("connection pool is closed")
+                        if self._waiters[0] is waiter and self._available():
+                            break
+                        remaining = None if self.timeout is None else self.timeout - (time.time() - t0)
+                        if remaining is not None and remaining <= 0:
+                            raise HGVSError("timed out after {t}s waiting for one of {n} database connections".format(
+                                t=self.timeout, n=self.maxconn))
+                        waiter.wait(remaining)
+                finally:
+                    self._waiters.remove(waiter)
+                    self._wake()    # the next waiter may proceed
+                wait_time = time.time() - t0
+                self._n_waits += 1
+                self._wait_time += wait_time
+                self._max_wait_time = max(self._max_wait_time, wait_time)
+            if self._idle:
+                conn, returned = self._idle.pop()
+            else:
+                conn, returned = None, None
+                self._n_open += 1    # reserve the slot while connecting
+            self._n_in_use += 1
+
+        try:
+            if conn is None:
+                conn = self._connect()
+                with self._lock:
+                    self._n_opened += 1
+            elif conn.closed or (time.time() - returned >= self.check_idle and not self._is_alive(conn)):
+                _logger.warning("Replacing dead pooled database connection")
+                _close_quietly(conn)
+                conn = self._connect()
+                with self._lock:
+                    self._n_discarded += 1
+                    self._n_opened += 1
+        except Exception:
+            with self._lock:
+                self._n_open -= 1
+                self._n_in_use -= 1
+                self._wake()
+            raise
+        return conn
+
+    def putconn(self, conn, broken=False):
+        """returns conn to the pool; broken (or closed) connections are
+        closed and discarded, leaving the others in place.  A broken
+        connection often means that others are broken too (e.g., after a
+        server restart), so idle connections are then checked before
+        reuse."""
+        with self._lock:
+            self._n_in_use -= 1
+            if not (broken or conn.closed or self._closed):
+                self._idle.append((conn, time.time()))
+                self._wake()
+                return
+            if broken:
+                self._idle = deque((c, 0) for c, _ in self._idle)
+        self._discard(conn)
+
+    def closeall(self):
+        """closes idle connections; connections in use are closed when
+        returned, and threads waiting in getconn() raise HGVSError"""
+        with self._lock:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            for waiter in self._waiters:
+                waiter.notify_all()
+        for conn in idle:
+            self._discard(conn)
+
+    def stats(self):
+        """returns a dict of pool gauges (in_use, idle, open, waiting) and
+        counters since creation (gets, waits, total and maximum wait time
+        in seconds, connections opened and discarded).  A high proportion
+        of waits or a long wait time indicates that maxconn is too small
+        for the workload; an idle count that stays high, that it is too
+        large."""
+        with self._lock:
+            return {
+                "maxconn": self.maxconn,
+                "open": self._n_open,
+                "in_use": self._n_in_use,
+                "idle": len(self._idle),
+                "waiting": len(self._waiters),
+                "gets": self._n_gets,
+                "waits": self._n_waits,
+                "wait_time": self._wait_time,
+                "max_wait_time": self._max_wait_time,
+                "opened": self._n_opened,
+                "discarded": self._n_discarded,
+            }
+
+
+# <LICENSE>
+# Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# </LICENSE>
@@ -6,15 +6,43 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import abc
+from collections import OrderedDict
 
 import vvhgvs
 
+from ..compiledalignment import CompiledAlignment
 from ..decorators.lru_cache import lru_cache, LEARN, RUN, VERIFY
-from ..utils.PersistentDict import PersistentDict
+from ..exceptions import HGVSDataNotAvailableError
+from .seqcache import fetch_seqs
+from ..utils.JournaledDict import JournaledDict
+from ..utils.MappedDict import MappedDict
 from six.moves import map
 import six
 
 
+def _lru_cache_params(name, negative=False):
+    """returns lru_cache size arguments for the named provider method
+
+    The [lru_cache] maxsize and policy settings apply to all methods
+    unless overridden by <name>_maxsize and <name>_policy;
+    <name>_maxbytes optionally sets a byte budget.  If negative is True,
+    HGVSDataNotAvailableErrors are cached according to negative_maxsize
+    and negative_ttl.
+    """
+    cfg = vvhgvs.global_config.lru_cache
+    params = {"maxsize": cfg.maxsize, "policy": cfg.provider_policy}
+    if name + "_maxsize" in cfg:
+        params["maxsize"] = cfg[name + "_maxsize"]
+    if name + "_policy" in cfg:
+        params["policy"] = cfg[name + "_policy"]
+    if name + "_maxbytes" in cfg:
+        params["maxbytes"] = cfg[name + "_maxbytes"]
+    if negative:
+        params["negative_maxsize"] = cfg.negative_maxsize
+        params["negative_ttl"] = cfg.negative_ttl
+    return params
+
+
 class Interface(six.with_metaclass(abc.ABCMeta, object)):
     """Variant mapping and validation requires access to external data,
     specifically exon structures, transcript alignments, and protein
@@ -45,7 +73,8 @@ class Interface(six.with_metaclass(abc.ABCMeta, object)):
         """
         :param mode: cache mode (None[default lru cache], 'learn', 'run', 'verify')
         :type mode: str
-        :param cache: local cache file name
+        :param cache: local cache file name; in run and verify modes this
+            may also be a read-only MappedDict file
         :type cache: str
         """
         self.mode = None
@@ -59,52 +88,20 @@ class Interface(six.with_metaclass(abc.ABCMeta, object)):
         self.cache = None
         if self.mode is not None:
             if self.mode == LEARN:
-                self.cache = PersistentDict(cache, flag='c')
+                self.cache = JournaledDict(cache, flag='c')
+            elif MappedDict.is_mapped(cache):
+                self.cache = MappedDict(cache)
             else:
-                self.cache = PersistentDict(cache, flag='r')
-
-        self.data_version = lru_cache(
-            maxsize=vvhgvs.global_config.lru_cache.maxsize, mode=self.mode, cache=self.cache)(self.data_version)
-        self.schema_version = lru_cache(
-            maxsize=vvhgvs.global_config.lru_cache.maxsize, mode=self.mode, cache=self.cache)(self.schema_version)
-        self.get_acs_for_protein_seq = lru_cache(
-            maxsize=vvhgvs.global_config.lru_cache.maxsize, mode=self.mode,
-            cache=self.cache)(self.get_acs_for_protein_seq)
-        self.get_gene_info = lru_cache(
-            maxsize=vvhgvs.global_config.lru_cache.maxsize, mode=self.mode, cache=self.cache)(self.get_gene_info)
-        self.get_pro_ac_for_tx_ac = lru_cache(
-            maxsize=vvhgvs.global_config.lru_cache.maxsize, mode=self.mode, cache=self.cache)(self.get_pro_ac_for_tx_ac)
-        self.get_seq = lru_cache(
-            maxsize=vvhgvs.global_config.lru_cache.maxsize, mode=self.mode, cache=self.cache)(self.get_seq)
-        self.get_similar_transcripts = lru_cache(
-            maxsize=vvhgvs.global_config.lru_cache.maxsize, mode=self.mode,
-            cache=self.cache)(self.get_similar_transcripts)
-        self.get_tx_exons = lru_cache(
-            maxsize=vvhgvs.global_config.lru_cache.maxsize, mode=self.mode, cache=self.cache)(self.get_tx_exons)
-        self.get_tx_for_gene = lru_cache(
-            maxsize=vvhgvs.global_config.lru_cache.maxsize, mode=self.mode, cache=self.cache)(self.get_tx_for_gene)
-        self.get_tx_for_region = lru_cache(
-            maxsize=vvhgvs.global_config.lru_cache.maxsize, mode=self.mode, cache=self.cache)(self.get_tx_for_region)
-        self.get_tx_identity_info = lru_cache(
-            maxsize=vvhgvs.global_config.lru_cache.maxsize, mode=self.mode, cache=self.cache)(self.get_tx_identity_info)
-        self.get_tx_info = lru_cache(
-            maxsize=vvhgvs.global_config.lru_cache.maxsize, mode=self.mode, cache=self.cache)(self.get_tx_info)
-        self.get_tx_mapping_options = lru_cache(
-            maxsize=vvhgvs.global_config.lru_cache.maxsize, mode=self.mode, cache=self.cache)(self.get_tx_mapping_options)
-
-        self.get_tx_for_gene_id = lru_cache(
-            maxsize=vvhgvs.global_config.lru_cache.maxsize, mode=self.mode, cache=self.cache)(self.get_tx_for_gene_id)
-        self.get_gene_info_by_id = lru_cache(
-            maxsize=vvhgvs.global_config.lru_cache.maxsize, mode=self.mode, cache=self.cache)(self.get_gene_info_by_id)
-        self.get_gene_info_by_alias = lru_cache(
-            maxsize=vvhgvs.global_config.lru_cache.maxsize, mode=self.mode, cache=self.cache)(self.get_gene_info_by_alias)
-        self.get_tx_limits = lru_cache(
-            maxsize=vvhgvs.global_config.lru_cache.maxsize, mode=self.mode, cache=self.cache)(self.get_tx_limits)
-        self.get_agg_exon_aln = lru_cache(
-            maxsize=vvhgvs.global_config.lru_cache.maxsize, mode=self.mode, cache=self.cache)(self.get_agg_exon_aln)
-        self.get_tx_seq_anno =lru_cache(
-                maxsize=vvhgvs.global_config.lru_cache.maxsize, mode=self.mode, cache=self.cache)(self.get_tx_seq_anno)
+                self.cache = JournaledDict(cache, flag='r')
 
+        for name in self._cached_methods:
+            params = _lru_cache_params(name, negative=name in self._negative_cached_methods)
+            if name == "get_seq" and self._seqfetcher_caches_seqs():
+                # the seqfetcher's caches already hold the fetched bases
+                params["maxbytes"] = vvhgvs.global_config.lru_cache.get_seq_maxbytes_seqcache
+            setattr(self, name, lru_cache(mode=self.mode, cache=self.cache, **params)(getattr(self, name)))
+        for name in self._memory_cached_methods:
+            setattr(self, name, lru_cache(**_lru_cache_params(name))(getattr(self, name)))
 
         def _split_version_string(v):
             versions = list(map(int, v.split(".")))
@@ -125,6 +122,134 @@ class Interface(six.with_metaclass(abc.ABCMeta, object)):
             "Incompatible versions: {k} requires schema version {rv}, but {self.url} provides version {av}".format(
                 k=type(self).__name__, self=self, rv=self.required_version, av=self.schema_version()))
 
+    def _seqfetcher_caches_seqs(self):
+        """returns True if the provider's seqfetcher has a block or
+        transcript sequence cache"""
+        seqfetcher = getattr(self, "seqfetcher", None)
+        return (getattr(seqfetcher, "block_cache", None) is not None
+                or getattr(seqfetcher, "transcript_cache", None) is not None)
+
+    def cache_info(self):
+        """returns a dict of lru_cache statistics (CacheInfo) for each cached method"""
+        return {
+            name: getattr(self, name).cache_info()
+            for name in self._cached_methods + self._memory_cached_methods
+        }
+
+    def cache_bytes_info(self):
+        """returns a dict of lru_cache byte budget and usage
+        (CacheBytesInfo) for each cached method"""
+        return {
+            name: getattr(self, name).cache_bytes_info()
+            for name in self._cached_methods + self._memory_cached_methods
+        }
+
+    def prime_cache(self, name, args, result):
+        """stores result as the cached result of calling the named provider
+        method with args (a tuple), e.g., from the result of a batch query;
+        a result that is already cached is kept"""
+        getattr(self, name).cache_prime(tuple(args), result)
+
+    ############################################################################
+    # Batch lookups
+    # These return dicts keyed by transcript accession with the values the
+    # corresponding single-transcript methods return.  The defaults here
+    # call those methods once per transcript; subclasses may override them
+    # with bulk queries that prime the single-transcript caches.
+
+    def get_agg_exon_aln_batch(self, tx_acs, alt_ac, alt_aln_method):
+        """returns {tx_ac: get_agg_exon_aln(tx_ac, alt_ac, alt_aln_method)}"""
+        return {tx_ac: self.get_agg_exon_aln(tx_ac, alt_ac, alt_aln_method) for tx_ac in tx_acs}
+
+    def get_tx_info_batch(self, tx_acs, alt_ac, alt_aln_method):
+        """returns {tx_ac: get_tx_info(tx_ac, alt_ac, alt_aln_method)}, omitting
+        transcripts for which get_tx_info raises HGVSDataNotAvailableError"""
+        return self._batch_omitting_unavailable(self.get_tx_info, tx_acs, alt_ac, alt_aln_method)
+
+    def get_tx_limits_batch(self, tx_acs):
+        """returns {tx_ac: get_tx_limits(tx_ac)}, omitting transcripts for
+        which get_tx_limits raises HGVSDataNotAvailableError"""
+        return self._batch_omitting_unavailable(self.get_tx_limits, tx_acs)
+
+    def get_tx_mapping_options_batch(self, tx_acs):
+        """returns {tx_ac: get_tx_mapping_options(tx_ac)}"""
+        return {tx_ac: self.get_tx_mapping_options(tx_ac) for tx_ac in tx_acs}
+
+    def prefetch_region(self, alt_ac, start, end, alt_aln_method):
+        """fetches the transcripts that overlap the region start..end
+        (1-based, inclusive, as for get_tx_for_region) of alt_ac and their
+        alignments, limits, info and mapping options with the batch
+        methods above, so that mapping variants in the region needs no
+        further queries for them.  Returns the get_tx_for_region rows.
+
+        A client that reads variants in genomic order can call this for a
+        window ahead of its current position.
+        """
+        rows = self.get_tx_for_region(alt_ac, alt_aln_method, start, end)
+        tx_acs = list(OrderedDict.fromkeys(r["tx_ac"] for r in rows))
+        if tx_acs:
+            self.get_agg_exon_aln_batch(tx_acs, alt_ac, alt_aln_method)
+            self.get_tx_limits_batch(tx_acs)
+            self.get_tx_info_batch(tx_acs, alt_ac, alt_aln_method)
+            self.get_tx_mapping_options_batch(tx_acs)
+        return rows
+
+    def get_compiled_alignment(self, tx_ac, alt_ac, alt_aln_method):
+        """returns a :class:`vvhgvs.compiledalignment.CompiledAlignment` of
+        get_agg_exon_aln(tx_ac, alt_ac, alt_aln_method), or None if that is
+        None.  Results are cached, so each alignment is compiled once and
+        shared by the mappers constructed for it."""
+        agg_exon_aln = self.get_agg_exon_aln(tx_ac, alt_ac, alt_aln_method)
+        if agg_exon_aln is None:
+            return None
+        return CompiledAlignment.from_agg_exon_aln(tx_ac, alt_ac, alt_aln_method, agg_exon_aln)
+
+    @staticmethod
+    def _batch_omitting_unavailable(method, tx_acs, *args):
+        results = {}
+        for tx_ac in tx_acs:
+            try:
+                results[tx_ac] = method(tx_ac, *args)
+            except HGVSDataNotAvailableError:
+                pass
+        return results
+
+    # provider methods wrapped with lru_cache on instantiation
+    _cached_methods = (
+        "data_version",
+        "schema_version",
+        "get_acs_for_protein_seq",
+        "get_gene_info",
+        "get_pro_ac_for_tx_ac",
+        "get_seq",
+        "get_similar_transcripts",
+        "get_tx_exons",
+        "get_tx_for_gene",
+        "get_tx_for_region",
+        "get_tx_identity_info",
+        "get_tx_info",
+        "get_tx_mapping_options",
+        "get_tx_for_gene_id",
+        "get_gene_info_by_id",
+        "get_gene_info_by_alias",
+        "get_tx_limits",
+        "get_agg_exon_aln",
+        "get_tx_seq_anno",
+    )
+
+    # provider methods wrapped with an in-memory lru_cache on
+    # instantiation; their results are derived from cached methods, so
+    # they are not stored in the learn/run cache file
+    _memory_cached_methods = ("get_compiled_alignment", )
+
+    # cached methods whose "not found" errors (HGVSDataNotAvailableError) are also cached
+    _negative_cached_methods = (
+        "get_tx_exons",
+        "get_tx_identity_info",
+        "get_tx_info",
+        "get_tx_limits",
+    )
+
     # required_version: what version of the remote schema is required
     # by the subclass? This value is compared to the result of
     # schema_version, which must be implemented by the class.
@@ -166,6 +291,16 @@ class Interface(six.with_metaclass(abc.ABCMeta, object)):
     def get_seq(self, ac, start_i=None, end_i=None):
         pass
 
+    def get_seqs(self, requests):
+        """returns sequence slices for a list of (ac, start_i, end_i)
+        tuples, in order
+
+        Overlapping ranges on the same accession are coalesced so that
+        each is read once.  Subclasses with direct access to sequence
+        storage may override this.
+        """
+        return fetch_seqs(self.get_seq, requests)
+
     @abc.abstractmethod
     def get_similar_transcripts(self, tx_ac):
         pass
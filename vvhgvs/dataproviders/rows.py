@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""compact database rows for data providers
+
+Rows returned by psycopg2's DictCursor are lists that each carry a
+reference to a column index, and each pickled DictRow carries its own
+copy of that index.  Provider results are held for the life of the
+process in the lru caches (and pickled into persistent caches), so the
+UTA provider instead returns Row instances: tuples whose column index
+is stored once on a class shared by all rows with the same columns.
+
+Rows support the access patterns of DictRow: by position, by column
+name (row["tx_ac"]), keys(), items(), get(), dict(row), and comparison
+with lists.
+
+>>> TxRow = row_class(("tx_ac", "alt_ac", "alt_aln_method"))
+>>> row = TxRow(("NM_000551.3", "NC_000003.11", "splign"))
+>>> row["alt_ac"], row[2]
+('NC_000003.11', 'splign')
+>>> row == ["NM_000551.3", "NC_000003.11", "splign"]
+True
+>>> dict(row)["tx_ac"]
+'NM_000551.3'
+
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import psycopg2.extensions
+import six
+
+
+class Row(tuple):
+    """base class for rows; use row_class() to obtain a subclass for a
+    set of column names"""
+
+    __slots__ = ()
+    _fields = ()
+    _index = {}
+
+    def __getitem__(self, key, _getitem=tuple.__getitem__):
+        # _index maps both column names and valid integer positions
+        try:
+            return _getitem(self, self._index[key])
+        except (KeyError, TypeError):
+            if isinstance(key, six.string_types):
+                raise KeyError(key)
+            return _getitem(self, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except (KeyError, IndexError):
+            return default
+
+    def keys(self):
+        return list(self._fields)
+
+    def values(self):
+        return list(self)
+
+    def items(self):
+        return list(zip(self._fields, self))
+
+    def __eq__(self, other):
+        if isinstance(other, list):
+            other = tuple(other)
+        return tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = tuple.__hash__
+
+    def __reduce__(self):
+        return (_make_row, (self._fields, tuple(self)))
+
+    def __repr__(self):
+        return "Row({})".format(", ".join("{}={!r}".format(k, v) for k, v in zip(self._fields, self)))
+
+
+_row_classes = {}
+
+
+def row_class(fields):
+    """returns the Row subclass for the given sequence of column names"""
+    fields = tuple(fields)
+    cls = _row_classes.get(fields)
+    if cls is None:
+        # with duplicate column names, the last one wins (as in DictRow)
+        index = {name: i for i, name in enumerate(fields)}
+        index.update((i, i) for i in range(-len(fields), len(fields)))
+        cls = _row_classes[fields] = type(str("Row"), (Row, ), {"__slots__": (), "_fields": fields, "_index": index})
+    return cls
+
+
+def _make_row(fields, values):
+    return row_class(fields)(values)
+
+
+class RowCursor(psycopg2.extensions.cursor):
+    """psycopg2 cursor that returns Row instances"""
+
+    _row_class = None
+
+    def execute(self, query, vars=None):
+        self._row_class = None
+        return super(RowCursor, self).execute(query, vars)
+
+    def _get_row_class(self):
+        if self._row_class is None:
+            self._row_class = row_class(d[0] for d in self.description)
+        return self._row_class
+
+    def fetchone(self):
+        t = super(RowCursor, self).fetchone()
+        return None if t is None else self._get_row_class()(t)
+
+    def fetchmany(self, size=None):
+        ts = super(RowCursor, self).fetchmany(size) if size is not None else super(RowCursor, self).fetchmany()
+        cls = self._get_row_class()
+        return [cls(t) for t in ts]
+
+    def fetchall(self):
+        ts = super(RowCursor, self).fetchall()
+        cls = self._get_row_class()
+        return [cls(t) for t in ts]
+
+    def __iter__(self):
+        it = super(RowCursor, self).__iter__()
+        cls = None
+        for t in it:
+            if cls is None:
+                cls = self._get_row_class()
+            yield cls(t)
+
+
+# <LICENSE>
+# Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# </LICENSE>
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""caches for sequence fetching
+
+Sequence requests made while validating, normalizing and mapping a
+variant are overlapping slices of the same few sequences, so caching
+them on exact (ac, start_i, end_i) keys rarely hits.  The caches in this
+module fetch larger units of sequence and serve any slice from them.
+
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import logging
+import re
+from collections import OrderedDict
+from threading import Lock
+
+_logger = logging.getLogger(__name__)
+
+
+def fetch_seqs(fetcher, requests):
+    """returns the slices for a list of (ac, start_i, end_i) requests, in
+    order, calling fetcher(ac, start_i, end_i) once for each set of
+    overlapping or adjacent ranges on an accession
+
+    start_i and end_i may be None, as for fetch_seq; a None end_i reads
+    to the end of the sequence.
+
+    >>> seq = "ACGT" * 5
+    >>> calls = []
+    >>> def fetcher(ac, s, e):
+    ...     calls.append((ac, s, e))
+    ...     return seq[s:e]
+    >>> fetch_seqs(fetcher, [("NC_0", 2, 6), ("NC_1", 0, 2), ("NC_0", 0, 4), ("NC_0", 10, None)])
+    ['GTAC', 'AC', 'ACGT', 'GTACGTACGT']
+    >>> calls
+    [('NC_0', 0, 6), ('NC_0', 10, None), ('NC_1', 0, 2)]
+
+    """
+    by_ac = OrderedDict()
+    for i, (ac, start_i, end_i) in enumerate(requests):
+        by_ac.setdefault(ac, []).append((start_i or 0, end_i, i))
+
+    def _fetch_run(ac, run_start, run_end, members):
+        seq = fetcher(ac, run_start, run_end)
+        for start_i, end_i, i in members:
+            results[i] = seq[start_i - run_start:None if end_i is None else max(start_i, end_i) - run_start]
+
+    results = [None] * len(requests)
+    for ac, ranges in by_ac.items():
+        ranges.sort(key=lambda r: r[0])
+        members = []
+        for start_i, end_i, i in ranges:
+            if members and run_end is not None and start_i > run_end:
+                _fetch_run(ac, run_start, run_end, members)
+                members = []
+            if not members:
+                run_start, run_end = start_i, end_i
+            elif run_end is not None:
+                run_end = None if end_i is None else max(run_end, end_i)
+            members.append((start_i, end_i, i))
+        _fetch_run(ac, run_start, run_end, members)
+    return results
+
+
+class BlockSeqCache(object):
+    """Serves sequence slices from fixed-size blocks aligned on multiples
+    of block_size, fetching runs of missing blocks with a single call to
+    fetcher(ac, start_i, end_i).  Blocks are evicted in least recently
+    used order when their total length exceeds maxbytes.
+
+    Requests without an end_i (i.e., to the end of the sequence) are
+    passed to fetcher unchanged.
+
+    >>> seq = "ACGT" * 5
+    >>> bsc = BlockSeqCache(lambda ac, s, e: seq[s:e], block_size=8, maxbytes=64)
+    >>> bsc.fetch_seq("NC_0", 3, 13)
+    'TACGTACGTA'
+    >>> bsc.fetch_seq("NC_0", 18, 25)
+    'GT'
+    >>> bsc.cache_info()
+    {'hits': 0, 'misses': 3, 'currsize': 3, 'currbytes': 20, 'maxbytes': 64}
+
+    """
+
+    def __init__(self, fetcher, block_size=4096, maxbytes=64 * 1024 * 1024):
+        self.fetcher = fetcher
+        self.block_size = block_size
+        self.maxbytes = maxbytes
+        self._blocks = OrderedDict()    # (ac, block index) -> sequence
+        self._lock = Lock()
+        self._hits = self._misses = self._currbytes = 0
+
+    def fetch_seq(self, ac, start_i=None, end_i=None):
+        if start_i is None:
+            start_i = 0
+        if end_i is None or end_i <= start_i:
+            return self.fetcher(ac, start_i, end_i)
+
+        bs = self.block_size
+        first_b, last_b = start_i // bs, (end_i - 1) // bs
+        blocks = self._get_blocks(ac, first_b, last_b)
+        seq = "".join(blocks)
+        offset = start_i - first_b * bs
+        return seq[offset:offset + end_i - start_i]
+
+    def _get_blocks(self, ac, first_b, last_b):
+        """returns blocks first_b..last_b (inclusive) of ac, stopping after the
+        last (short) block of the sequence"""
+        bs = self.block_size
+        blocks = []
+        b = first_b
+        while b <= last_b:
+            with self._lock:
+                blk = self._blocks.get((ac, b))
+                if blk is not None:
+                    self._blocks.move_to_end((ac, b))
+                    self._hits += 1
+            if blk is None:
+                # fetch this and all following missing blocks in one request
+                run_end_b = b
+                with self._lock:
+                    while run_end_b < last_b and (ac, run_end_b + 1) not in self._blocks:
+                        run_end_b += 1
+                seq = self.fetcher(ac, b * bs, (run_end_b + 1) * bs)
+                fetched = [seq[i:i + bs] for i in range(0, (run_end_b - b + 1) * bs, bs)]
+                self._store(ac, b, fetched)
+                for blk in fetched:
+                    blocks.append(blk)
+                    if len(blk) < bs:
+                        return blocks
+                b = run_end_b + 1
+                continue
+            blocks.append(blk)
+            if len(blk) < bs:
+                break
+            b += 1
+        return blocks
+
+    def _store(self, ac, first_b, blocks):
+        with self._lock:
+            for i, blk in enumerate(blocks):
+                key = (ac, first_b + i)
+                if key in self._blocks:
+                    continue
+                self._blocks[key] = blk
+                self._currbytes += len(blk)
+                self._misses += 1
+                if len(blk) < self.block_size:
+                    break
+            while self._currbytes > self.maxbytes and self._blocks:
+                _, old = self._blocks.popitem(last=False)
+                self._currbytes -= len(old)
+
+    def cache_info(self):
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "currsize": len(self._blocks),
+                "currbytes": self._currbytes,
+                "maxbytes": self.maxbytes,
+            }
+
+    def cache_clear(self):
+        with self._lock:
+            self._blocks.clear()
+            self._hits = self._misses = self._currbytes = 0
+
+
+class TranscriptSeqCache(object):
+    """Serves sequence slices for transcript accessions from whole
+    sequences, fetched with a single fetcher(ac, None, None) call on the
+    first request for each accession.  Sequences are evicted in least
+    recently used order when their total length exceeds maxbytes.
+
+    Only accessions matching tx_ac_re are cached; use handles(ac) to
+    test whether an accession should be fetched through this cache.
+
+    >>> seqs = {"NM_0.1": "ACGT" * 5}
+    >>> tsc = TranscriptSeqCache(lambda ac, s, e: seqs[ac][s:e], maxbytes=64)
+    >>> tsc.handles("NM_0.1"), tsc.handles("NC_000001.11")
+    (True, False)
+    >>> tsc.fetch_seq("NM_0.1", 3, 13), tsc.fetch_seq("NM_0.1", 18)
+    ('TACGTACGTA', 'GT')
+    >>> tsc.cache_info()
+    {'hits': 1, 'misses': 1, 'currsize': 1, 'currbytes': 20, 'maxbytes': 64}
+
+    """
+
+    tx_ac_re = re.compile(r"^(?:NM_|NR_|XM_|XR_|ENST)")
+
+    def __init__(self, fetcher, maxbytes=32 * 1024 * 1024, tx_ac_re=None):
+        self.fetcher = fetcher
+        self.maxbytes = maxbytes
+        if tx_ac_re is not None:
+            self.tx_ac_re = re.compile(tx_ac_re)
+        self._seqs = OrderedDict()    # ac -> sequence
+        self._lock = Lock()
+        self._hits = self._misses = self._currbytes = 0
+
+    def handles(self, ac):
+        return self.tx_ac_re.match(ac) is not None
+
+    def fetch_seq(self, ac, start_i=None, end_i=None):
+        with self._lock:
+            seq = self._seqs.get(ac)
+            if seq is not None:
+                self._seqs.move_to_end(ac)
+                self._hits += 1
+        if seq is None:
+            seq = self.fetcher(ac, None, None)
+            self._store(ac, seq)
+        return seq[start_i:end_i]
+
+    def _store(self, ac, seq):
+        with self._lock:
+            self._misses += 1
+            if ac in self._seqs or len(seq) > self.maxbytes:
+                return
+            self._seqs[ac] = seq
+            self._currbytes += len(seq)
+            while self._currbytes > self.maxbytes:
+                _, old = self._seqs.popitem(last=False)
+                self._currbytes -= len(old)
+
+    def cache_info(self):
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "currsize": len(self._seqs),
+                "currbytes": self._currbytes,
+                "maxbytes": self.maxbytes,
+            }
+
+    def cache_clear(self):
+        with self._lock:
+            self._seqs.clear()
+            self._hits = self._misses = self._currbytes = 0
+
+
+# <LICENSE>
+# Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# </LICENSE>
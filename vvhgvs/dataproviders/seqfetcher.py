@@ -8,11 +8,13 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import logging
 import os
 import re
-from threading import Lock
+import threading
 
 import bioutils.seqfetcher
 
+import vvhgvs
 from ..exceptions import HGVSDataNotAvailableError
+from .seqcache import BlockSeqCache, TranscriptSeqCache, fetch_seqs
 
 _logger = logging.getLogger(__name__)
 
@@ -28,24 +30,67 @@ class SeqFetcher(object):
     >> sf.fetch_seq('NP_056374.2',0,10)
     'MESRETLSSS'
 
+    Ranged fetches are served from a cache of aligned sequence blocks
+    (see :class:`vvhgvs.dataproviders.seqcache.BlockSeqCache`), sized by
+    the [seqfetcher] block_size and block_cache_maxbytes settings; set
+    block_cache_maxbytes to 0 to disable it.  Transcript sequences
+    (NM_, NR_, XM_, XR_, ENST) are instead fetched whole and kept in a
+    :class:`vvhgvs.dataproviders.seqcache.TranscriptSeqCache` of
+    transcript_cache_maxbytes.
+
     """
-    
-    def __init__(self, check_same_thread=False):
+
+    def __init__(self, check_same_thread=False, thread_local=None):
+        """
+        :param bool check_same_thread: passed to SeqRepo; if False, a single
+            SeqRepo instance is shared by all threads and fetches are serialized
+            with a lock
+        :param bool thread_local: if True, each thread opens its own SeqRepo on
+            the same directory and fetches without locking; defaults to the
+            [seqfetcher] thread_local setting
+        """
         # If HGVS_SEQREPO_DIR is defined, we use seqrepo for *all* sequences
+        # If HGVS_SEQ_FILES is defined (a list of FASTA/2bit paths separated
+        # by os.pathsep), sequences are read from those files
         # Otherwise, we fall back to remote sequence fetching
         seqrepo_dir = os.environ.get("HGVS_SEQREPO_DIR")
-        self.lock = Lock()
+        seq_files = os.environ.get("HGVS_SEQ_FILES")
+        if thread_local is None:
+            thread_local = vvhgvs.global_config.seqfetcher.thread_local
+        self.check_same_thread = check_same_thread
+        self.thread_local = thread_local
+        self.lock = None
 
         if seqrepo_dir:
             from biocommons.seqrepo import SeqRepo
-            sr = SeqRepo(seqrepo_dir, check_same_thread)
 
-            def _fetch_seq_seqrepo(ac, start_i=None, end_i=None):
-                return sr.fetch(ac, start_i, end_i)
+            if thread_local:
+                local = threading.local()
+
+                def _fetch_seq_seqrepo(ac, start_i=None, end_i=None):
+                    sr = getattr(local, "sr", None)
+                    if sr is None:
+                        # each instance is used by one thread only, but may be
+                        # garbage collected from another one
+                        sr = local.sr = SeqRepo(seqrepo_dir, check_same_thread=False)
+                    return sr.fetch(ac, start_i, end_i)
+
+            else:
+                sr = SeqRepo(seqrepo_dir, check_same_thread=check_same_thread)
+                if check_same_thread is False:
+                    self.lock = threading.Lock()
+
+                def _fetch_seq_seqrepo(ac, start_i=None, end_i=None):
+                    return sr.fetch(ac, start_i, end_i)
 
-            self.check_same_thread = check_same_thread
             self.fetcher = _fetch_seq_seqrepo
             self.source = "SeqRepo ({})".format(seqrepo_dir)
+        elif seq_files:
+            from .seqfile import SeqFiles
+
+            sfs = SeqFiles(seq_files.split(os.pathsep))
+            self.fetcher = sfs.fetch
+            self.source = "sequence files ({})".format(seq_files)
         else:
             quit("""
             V.V. usage can be quite heavy, variant validators "test_configuration.py" asserts that
@@ -56,28 +101,36 @@ class SeqFetcher(object):
             self.source = "bioutils.seqfetcher"
         _logger.info("Fetching sequences with " + self.source)
 
+        cfg = vvhgvs.global_config.seqfetcher
+        self.block_cache = None
+        if cfg.block_cache_maxbytes:
+            self.block_cache = BlockSeqCache(self._fetch_seq, block_size=cfg.block_size,
+                                             maxbytes=cfg.block_cache_maxbytes)
+        self.transcript_cache = None
+        if cfg.transcript_cache_maxbytes:
+            self.transcript_cache = TranscriptSeqCache(self._fetch_seq, maxbytes=cfg.transcript_cache_maxbytes)
+
     def fetch_seq(self, ac, start_i=None, end_i=None):
-        if self.check_same_thread is False:
-            self.lock.acquire()
+        if self.transcript_cache is not None and self.transcript_cache.handles(ac):
+            return self.transcript_cache.fetch_seq(ac, start_i, end_i)
+        if self.block_cache is not None:
+            return self.block_cache.fetch_seq(ac, start_i, end_i)
+        return self._fetch_seq(ac, start_i, end_i)
+
+    def fetch_seqs(self, requests):
+        """returns slices for a list of (ac, start_i, end_i) tuples, in order,
+        reading overlapping ranges on each accession once"""
+        return fetch_seqs(self.fetch_seq, requests)
+
+    def _fetch_seq(self, ac, start_i=None, end_i=None):
         try:
-            fetched_seq = self.fetcher(ac, start_i, end_i)
+            if self.lock is not None:
+                with self.lock:
+                    return self.fetcher(ac, start_i, end_i)
+            return self.fetcher(ac, start_i, end_i)
         except Exception as ex:
-            try:
-                self.lock.release()
-            except AttributeError:
-                pass
-            except RuntimeError:
-                pass
             raise HGVSDataNotAvailableError("Failed to fetch {ac} from {self.source} ({ex})".format(
                 ac=ac, ex=ex, self=self))
-        else:
-            try:
-                self.lock.release()
-            except AttributeError:
-                pass
-            except RuntimeError:
-                pass
-            return fetched_seq
 
 
 # <LICENSE>
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""sequence access from local FASTA and 2bit files
+
+Plain FASTA (with a samtools .fai index) and 2bit files are memory
+mapped once when opened, so there is no per-call file open or seek.
+Each fetch copies the requested bytes out of the mapping and returns
+them as a new str (decoded and upper-cased for FASTA, unpacked for
+2bit).  bgzip-compressed FASTA (with .fai and .gzi indexes) cannot be
+mapped and is read through pysam, an optional dependency
+(``pip install vvhgvs[bgzip]``).
+
+Sequences are looked up by the first word of the FASTA header or 2bit
+record name.  NCBI-style names (gi|123173798|ref|NM_001005405.2|) may
+also be looked up by the accession following the database tag.
+
+These classes are used by SeqFetcher when HGVS_SEQ_FILES is set.
+
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import bisect
+import logging
+import mmap
+import struct
+import threading
+
+_logger = logging.getLogger(__name__)
+
+_DB_TAGS = ("dbj", "emb", "gb", "lcl", "ref")
+
+
+def _aliases(name):
+    """returns names under which a sequence may be looked up"""
+    aliases = [name]
+    if "|" in name:
+        parts = name.split("|")
+        aliases += [parts[i + 1] for i in range(len(parts) - 1) if parts[i] in _DB_TAGS and parts[i + 1]]
+    return aliases
+
+
+def _clip(start_i, end_i, length):
+    if start_i is None:
+        start_i = 0
+    if end_i is None or end_i > length:
+        end_i = length
+    return start_i, end_i
+
+
+class FastaFile(object):
+    """Sequence access to a FASTA file with a .fai index
+
+    >> ff = FastaFile("tests/data/sample_data/f2.human.rna.small.fna")
+    >> ff.fetch("NM_001005405.2", 0, 10)
+    'TGCTCCTCTA'
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._index = {}    # name -> (length, offset, line_bases, line_width)
+        self._names = {}    # alias -> name
+        with open(path + ".fai") as fai:
+            for line in fai:
+                name, length, offset, line_bases, line_width = line.rstrip("\n").split("\t")[:5]
+                self._index[name] = (int(length), int(offset), int(line_bases), int(line_width))
+                for alias in _aliases(name):
+                    self._names.setdefault(alias, name)
+
+        self._fh = open(path, "rb")
+        self._mm = None
+        self._pysam = None
+        if self._fh.read(2) == b"\x1f\x8b":
+            self._fh.close()
+            try:
+                import pysam
+            except ImportError:
+                raise RuntimeError("{path} is compressed; reading bgzip-compressed FASTA requires pysam"
+                                   " (pip install vvhgvs[bgzip])".format(path=path))
+            self._pysam = pysam.FastaFile(path)
+            self._pysam_lock = threading.Lock()
+        else:
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __contains__(self, ac):
+        return ac in self._names
+
+    def keys(self):
+        return self._names.keys()
+
+    def fetch(self, ac, start_i=None, end_i=None):
+        name = self._names[ac]
+        length, offset, line_bases, line_width = self._index[name]
+        start_i, end_i = _clip(start_i, end_i, length)
+        if start_i >= end_i:
+            return ""
+
+        if self._pysam is not None:
+            with self._pysam_lock:
+                return self._pysam.fetch(reference=name, start=start_i, end=end_i).upper()
+
+        b0 = offset + start_i // line_bases * line_width + start_i % line_bases
+        b1 = offset + (end_i - 1) // line_bases * line_width + (end_i - 1) % line_bases + 1
+        if (start_i // line_bases) == ((end_i - 1) // line_bases):
+            seq = self._mm[b0:b1]
+        else:
+            seq = self._mm[b0:b1].translate(None, b"\r\n")
+        return seq.decode("ascii").upper()
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._fh.close()
+        if self._pysam is not None:
+            self._pysam.close()
+
+
+# 2bit packs four bases per byte, two bits each, T=0 C=1 A=2 G=3
+_TWOBIT_SIGNATURE = 0x1A412743
+_TWOBIT_BYTES = tuple("".join("TCAG"[(b >> shift) & 3] for shift in (6, 4, 2, 0)) for b in range(256))
+
+
+class TwoBitFile(object):
+    """Sequence access to a UCSC 2bit file
+
+    Runs of N are restored from the record's N blocks; soft-masking is
+    ignored, so sequences are returned in upper case.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fh = open(path, "rb")
+        self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        for endian in "<>":
+            signature, version, n_seqs, _ = struct.unpack_from(endian + "IIII", self._mm, 0)
+            if signature == _TWOBIT_SIGNATURE:
+                break
+        else:
+            raise ValueError("{path} is not a 2bit file".format(path=path))
+        if version not in (0, 1):
+            raise ValueError("{path}: unsupported 2bit version {v}".format(path=path, v=version))
+        self._endian = endian
+        offset_fmt = endian + ("Q" if version == 1 else "I")
+        offset_size = struct.calcsize(offset_fmt)
+
+        self._offsets = {}    # name -> record offset
+        self._names = {}      # alias -> name
+        pos = 16
+        for _ in range(n_seqs):
+            name_size = self._mm[pos]
+            name = self._mm[pos + 1:pos + 1 + name_size].decode("ascii")
+            pos += 1 + name_size
+            self._offsets[name] = struct.unpack_from(offset_fmt, self._mm, pos)[0]
+            pos += offset_size
+            for alias in _aliases(name):
+                self._names.setdefault(alias, name)
+
+        self._records = {}    # name -> (length, n_starts, n_ends, dna_offset), read on first use
+
+    def __contains__(self, ac):
+        return ac in self._names
+
+    def keys(self):
+        return self._names.keys()
+
+    def _record(self, name):
+        rec = self._records.get(name)
+        if rec is None:
+            e = self._endian
+            pos = self._offsets[name]
+            length, n_count = struct.unpack_from(e + "II", self._mm, pos)
+            pos += 8
+            n_starts = struct.unpack_from(e + "{}I".format(n_count), self._mm, pos)
+            n_sizes = struct.unpack_from(e + "{}I".format(n_count), self._mm, pos + 4 * n_count)
+            pos += 8 * n_count
+            mask_count = struct.unpack_from(e + "I", self._mm, pos)[0]
+            pos += 4 + 8 * mask_count + 4
+            n_ends = tuple(s + n for s, n in zip(n_starts, n_sizes))
+            rec = self._records[name] = (length, n_starts, n_ends, pos)
+        return rec
+
+    def fetch(self, ac, start_i=None, end_i=None):
+        length, n_starts, n_ends, dna_offset = self._record(self._names[ac])
+        start_i, end_i = _clip(start_i, end_i, length)
+        if start_i >= end_i:
+            return ""
+
+        packed = self._mm[dna_offset + start_i // 4:dna_offset + (end_i + 3) // 4]
+        skip = start_i % 4
+        seq = "".join(map(_TWOBIT_BYTES.__getitem__, bytearray(packed)))[skip:skip + end_i - start_i]
+
+        # N blocks are sorted and non-overlapping; start at the first one ending after start_i
+        i = bisect.bisect_right(n_ends, start_i)
+        while i < len(n_starts) and n_starts[i] < end_i:
+            s, e = max(n_starts[i], start_i) - start_i, min(n_ends[i], end_i) - start_i
+            seq = seq[:s] + "N" * (e - s) + seq[e:]
+            i += 1
+        return seq
+
+    def close(self):
+        self._mm.close()
+        self._fh.close()
+
+
+def open_seqfile(path):
+    """returns a TwoBitFile for paths ending in .2bit, and a FastaFile otherwise"""
+    if path.endswith(".2bit"):
+        return TwoBitFile(path)
+    return FastaFile(path)
+
+
+class SeqFiles(object):
+    """Sequence access to a list of FASTA and 2bit files
+
+    An accession is fetched from the first file that contains it;
+    KeyError is raised if none does.
+
+    """
+
+    def __init__(self, paths):
+        self.files = [open_seqfile(p) for p in paths]
+        self._files_by_ac = {}
+        for sf in reversed(self.files):
+            self._files_by_ac.update((ac, sf) for ac in sf.keys())
+
+    def __contains__(self, ac):
+        return ac in self._files_by_ac
+
+    def fetch(self, ac, start_i=None, end_i=None):
+        try:
+            sf = self._files_by_ac[ac]
+        except KeyError:
+            raise KeyError("{ac} not found in any of {n} sequence files".format(ac=ac, n=len(self.files)))
+        return sf.fetch(ac, start_i, end_i)
+
+    def close(self):
+        for sf in self.files:
+            sf.close()
+
+
+# <LICENSE>
+# Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# </LICENSE>
@@ -8,13 +8,19 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 import contextlib
 import inspect
+import json
 import logging
 import os
+import random
 import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
 
 import psycopg2
-import psycopg2.extras
-import psycopg2.pool
+import psycopg2.extensions
+import psycopg2.sql
 
 from bioutils.assemblies import make_ac_name_map
 from bioutils.digests import seq_md5
@@ -22,13 +28,22 @@ from six.moves.urllib import parse as urlparse
 
 import vvhgvs
 from ..dataproviders.interface import Interface
+from ..decorators.lru_cache import RUN
 from ..exceptions import HGVSError, HGVSDataNotAvailableError
+from .rows import RowCursor, row_class
+from .connpool import ConnectionPool
 from .seqfetcher import SeqFetcher
+from ..utils.spanindex import SpanIndex
 import six
 
 _logger = logging.getLogger(__name__)
 
 
+def _unique(acs):
+    """returns acs as a list without duplicates, in order"""
+    return list(OrderedDict.fromkeys(acs))
+
+
 def _stage_from_version(version):
     """return "prd", "stg", or "dev" for the given version string.  A value is always returned"""
     if version:
@@ -64,7 +79,8 @@ def _get_uta_db_url():
     return vvhgvs.global_config['uta'][url_key]
 
 
-def connect(db_url=None, pooling=vvhgvs.global_config.uta.pooling, application_name=None, mode=None, cache=None):
+def connect(db_url=None, pooling=vvhgvs.global_config.uta.pooling, application_name=None, mode=None, cache=None,
+            prepared_statements=None, span_index=None, alias_index=None):
     """Connect to a UTA database instance and return a UTA interface instance.
 
     :param db_url: URL for database connection
@@ -73,6 +89,15 @@ def connect(db_url=None, pooling=vvhgvs.global_config.uta.pooling, application_n
     :type pooling: bool
     :param application_name: log application name in connection (useful for debugging; PostgreSQL only)
     :type application_name: str
+    :param prepared_statements: PREPARE frequently used queries once per connection (PostgreSQL only);
+        defaults to the [uta] prepared_statements setting
+    :type prepared_statements: bool
+    :param span_index: answer get_tx_for_region from an in-memory index of transcript spans;
+        defaults to the [uta] span_index setting
+    :type span_index: bool
+    :param alias_index: answer get_gene_info_by_alias from an in-memory alias index;
+        defaults to the [uta] alias_index setting
+    :type alias_index: bool
 
     When called with an explicit db_url argument, that db_url is used for connecting.
 
@@ -93,8 +118,13 @@ def connect(db_url=None, pooling=vvhgvs.global_config.uta.pooling, application_n
     A local postgresql database:
         postgresql://localhost/uta_dev/uta_20170707
 
+    A SQLite snapshot written by vvhgvs-uta-export:
+        sqlite:////data/uta_20170707.db
+
     For postgresql db_urls, pooling=True causes connect to use a
-    psycopg2.pool.ThreadedConnectionPool.
+    bounded vvhgvs.dataproviders.connpool.ConnectionPool of
+    [uta] pool_min to pool_max connections; pool_stats() reports its
+    usage.
     """
 
     _logger.debug('connecting to ' + str(db_url) + '...')
@@ -104,7 +134,11 @@ def connect(db_url=None, pooling=vvhgvs.global_config.uta.pooling, application_n
 
     url = _parse_url(db_url)
     if url.scheme == 'postgresql':
-        conn = UTA_postgresql(url=url, pooling=pooling, application_name=application_name, mode=mode, cache=cache)
+        conn = UTA_postgresql(url=url, pooling=pooling, application_name=application_name, mode=mode, cache=cache,
+                              prepared_statements=prepared_statements, span_index=span_index,
+                              alias_index=alias_index)
+    elif url.scheme == 'sqlite':
+        conn = UTA_sqlite(url=url, mode=mode, cache=cache, span_index=span_index, alias_index=alias_index)
     else:
         # fell through connection scheme cases
         raise RuntimeError("{url.scheme} in {url} is not currently supported".format(url=url))
@@ -136,6 +170,8 @@ class UTABase(Interface):
                 OR aliases LIKE '%%,' || %s || ',%%'
                 OR aliases LIKE '%%,' || %s
             ''',
+        # genes with aliases, for the in-memory alias index
+        "gene_aliases":"select * from gene where aliases is not NULL",
     # TODO: reconcile tx_exons query and build_tx_cigar
     # built_tx_cigar says it expects exons in transcript order, but this is genomic order.
         "tx_exons":"""
@@ -155,6 +191,17 @@ class UTABase(Interface):
             FROM full_tx_aln_w_nq_cigar_mv
             WHERE tx_ac=%s and alt_ac=%s and alt_aln_method=%s
             """,
+        # one row per element of the tx_ac array, in order; all NULL if not found
+        "agg_exon_aln_batch":"""
+            SELECT
+            alt_strand,mapped_start,not_quite_cigar,mapped_end,
+            cds_start_i, cds_end_i,
+            transcript_exon_start_end,mapped_exon_start_end
+            FROM unnest(%s::text[]) WITH ORDINALITY AS Q(tx_ac, ord)
+            LEFT JOIN full_tx_aln_w_nq_cigar_mv A
+            ON A.tx_ac=Q.tx_ac and A.alt_ac=%s and A.alt_aln_method=%s
+            ORDER BY Q.ord
+            """,
 
         "tx_for_gene":"""
             select hgnc, cds_start_i, cds_end_i, tx_ac, alt_ac, alt_aln_method
@@ -171,11 +218,32 @@ class UTABase(Interface):
             from current_valid_mapped_transcript_spans_mv 
             where alt_ac=%s and alt_aln_method=%s and start_i < %s and %s <= end_i
             """,
+        # all spans on a reference sequence, for the in-memory span index
+        "tx_spans":"""
+            select tx_ac,alt_ac,alt_strand,alt_aln_method,start_i,end_i
+            from current_valid_mapped_transcript_spans_mv
+            where alt_ac=%s and alt_aln_method=%s
+            """,
+        "tx_spans_batch":"""
+            select tx_ac,alt_ac,alt_strand,alt_aln_method,start_i,end_i
+            from current_valid_mapped_transcript_spans_mv
+            where alt_ac = ANY(%s) and alt_aln_method=%s
+            """,
+        "tx_spans_all":"""
+            select tx_ac,alt_ac,alt_strand,alt_aln_method,start_i,end_i
+            from current_valid_mapped_transcript_spans_mv
+            where alt_aln_method=%s
+            """,
         "tx_limits":"""
             SELECT ac, cds_start_i, cds_end_i, length, hgnc
             FROM transcript_lengths_mv
             WHERE ac=%s
             """,
+        "tx_limits_batch":"""
+            SELECT ac, cds_start_i, cds_end_i, length, hgnc
+            FROM transcript_lengths_mv
+            WHERE ac = ANY(%s)
+            """,
         # compat query for old tx_identity_info will work with numeric indexing
         "tx_identity_info":"""
             SELECT ac as tx_ac, NULL AS alt_ac, NULL AS alt_aln_method, cds_start_i, cds_end_i, ARRAY[length] AS lengths, hgnc
@@ -187,22 +255,44 @@ class UTABase(Interface):
             from all_mapped_transcript_mv
             where tx_ac=%s and alt_ac=%s and alt_aln_method=%s
             """,
+        "tx_info_batch":"""
+            select hgnc, cds_start_i, cds_end_i, tx_ac, alt_ac, alt_aln_method
+            from all_mapped_transcript_mv
+            where tx_ac = ANY(%s) and alt_ac=%s and alt_aln_method=%s
+            """,
         "tx_mapping_options": """
             select distinct tx_ac,alt_ac,alt_aln_method 
             from tx_exon_aln_mv where tx_ac=%s and cigar is not NULL
             """,
+        "tx_mapping_options_batch": """
+            select distinct tx_ac,alt_ac,alt_aln_method
+            from tx_exon_aln_mv where tx_ac = ANY(%s) and cigar is not NULL
+            """,
         "tx_seq":"select seq from seq S join seq_anno SA on S.seq_id=SA.seq_id where ac=%s",
         "tx_seq_anno":"select len,seq_id,descr from seq_anno join seq using(seq_id) where ac=%s",
         "tx_similar":"select * from tx_similarity_v where tx_ac1 = %s",
         "tx_to_pro":"select * from associated_accessions where tx_ac = %s order by pro_ac desc",
     }
 
-    def __init__(self, url, mode=None, cache=None):
+    def __init__(self, url, mode=None, cache=None, span_index=None, alias_index=None):
         self.url = url
         self.seqfetcher = SeqFetcher()
+        if span_index is None:
+            span_index = vvhgvs.global_config.uta.span_index
+        self.span_index = span_index
+        self._span_indexes = {}    # (alt_ac, alt_aln_method) -> SpanIndex of tx spans
+        self._prefetched_regions = {}    # (alt_ac, alt_aln_method) -> (start, end, SpanIndex of tx spans)
+        if alias_index is None:
+            alias_index = vvhgvs.global_config.uta.alias_index
+        self.alias_index = alias_index
+        self._alias_index = None    # alias -> [gene rows]
+        self._alias_index_lock = threading.Lock()
         if mode != 'run':
             self._connect()
         super(UTABase, self).__init__(mode, cache)
+        if self.span_index and self.mode is None:
+            # the index answers any region; caching exact coordinates would only fill the cache
+            self.get_tx_for_region = self.get_tx_for_region.__wrapped__
 
     def __str__(self):
         return ("{n} <data_version:{dv}; schema_version:{sv}; application_name={self.application_name};"
@@ -213,14 +303,17 @@ class UTABase(Interface):
                     sv=self.schema_version(),
                     sf=os.environ.get("HGVS_SEQREPO_DIR", "seqfetcher"))
 
+    def _execute(self, cur, sql, *args):
+        cur.execute(sql, *args)
+
     def _fetchone(self, sql, *args):
         with self._get_cursor() as cur:
-            cur.execute(sql, *args)
+            self._execute(cur, sql, *args)
             return cur.fetchone()
 
     def _fetchall(self, sql, *args):
         with self._get_cursor() as cur:
-            cur.execute(sql, *args)
+            self._execute(cur, sql, *args)
             return cur.fetchall()
 
     ############################################################################
@@ -235,6 +328,9 @@ class UTABase(Interface):
     def get_seq(self, ac, start_i=None, end_i=None):
         return self.seqfetcher.fetch_seq(ac, start_i, end_i)
 
+    def get_seqs(self, requests):
+        return self.seqfetcher.fetch_seqs(requests)
+
     def get_acs_for_protein_seq(self, seq):
         """
         returns a list of protein accessions for a given sequence.  The
@@ -266,11 +362,29 @@ class UTABase(Interface):
     def get_gene_info_by_id(self, gene_id):
         return self._fetchone(self._queries['gene_info_by_id'], [gene_id])
     def get_gene_info_by_alias(self, gene_alias):
+        if self.alias_index:
+            return list(self._get_alias_index().get(gene_alias, ()))
         return self._fetchall(
                 self._queries['gene_info_by_alias_symbol'],
                 [gene_alias,gene_alias,gene_alias,gene_alias]
                 )
 
+    def _get_alias_index(self):
+        """returns {alias: [gene rows]}, built from the gene table on first
+        use; each alias in the comma-separated aliases column is a key, so
+        lookups match the gene_info_by_alias_symbol query"""
+        if self._alias_index is None:
+            with self._alias_index_lock:
+                if self._alias_index is None:
+                    index = {}
+                    for row in self._fetchall(self._queries['gene_aliases']):
+                        for alias in row["aliases"].split(","):
+                            rows = index.setdefault(alias, [])
+                            if not rows or rows[-1] is not row:
+                                rows.append(row)
+                    self._alias_index = index
+        return self._alias_index
+
     def get_tx_exons(self, tx_ac, alt_ac, alt_aln_method):
         """
         return transcript exon info for supplied accession (tx_ac, alt_ac, alt_aln_method), or None if not found
@@ -337,6 +451,25 @@ class UTABase(Interface):
         return self._fetchone(self._queries['agg_exon_aln'], [tx_ac, alt_ac, alt_aln_method])
 
 
+    def get_agg_exon_aln_batch(self, tx_acs, alt_ac, alt_aln_method):
+        """
+        returns {tx_ac: get_agg_exon_aln(tx_ac, alt_ac, alt_aln_method)} for
+        a list of transcripts, with one query, and primes the
+        get_agg_exon_aln cache with the results
+        """
+        if self.mode == RUN:
+            return super(UTABase, self).get_agg_exon_aln_batch(tx_acs, alt_ac, alt_aln_method)
+        tx_acs = _unique(tx_acs)
+        rows = self._fetchall(self._queries['agg_exon_aln_batch'], [tx_acs, alt_ac, alt_aln_method])
+        if len(rows) != len(tx_acs):
+            # more than one alignment for some transcript; get_agg_exon_aln returns the first
+            return super(UTABase, self).get_agg_exon_aln_batch(tx_acs, alt_ac, alt_aln_method)
+        results = {}
+        for tx_ac, row in zip(tx_acs, rows):
+            results[tx_ac] = row if row["alt_strand"] is not None else None
+            self.prime_cache("get_agg_exon_aln", (tx_ac, alt_ac, alt_aln_method), results[tx_ac])
+        return results
+
     def get_tx_for_gene(self, gene):
         """
         return transcript info records for supplied gene, in order of decreasing length
@@ -362,8 +495,50 @@ class UTABase(Interface):
             start = end_i
             end_i = start_i
             start_i = start
+        if self.span_index:
+            return self._get_span_index(alt_ac, alt_aln_method).overlapping(start_i, end_i)
+        region = self._prefetched_regions.get((alt_ac, alt_aln_method))
+        if region is not None and region[0] <= start_i and end_i <= region[1]:
+            return region[2].overlapping(start_i, end_i)
         return self._fetchall(self._queries['tx_for_region'], [alt_ac, alt_aln_method, end_i, start_i])
 
+    def prefetch_region(self, alt_ac, start, end, alt_aln_method):
+        """as Interface.prefetch_region, with one query for each kind of
+        data; in addition, get_tx_for_region answers queries within the
+        region from its result until another region on alt_ac is
+        prefetched"""
+        if start > end:
+            start, end = end, start
+        rows = super(UTABase, self).prefetch_region(alt_ac, start, end, alt_aln_method)
+        self._prefetched_regions[alt_ac, alt_aln_method] = (start, end,
+                                                            SpanIndex((r["start_i"], r["end_i"], r) for r in rows))
+        return rows
+
+    def _get_span_index(self, alt_ac, alt_aln_method):
+        si = self._span_indexes.get((alt_ac, alt_aln_method))
+        if si is None:
+            rows = self._fetchall(self._queries['tx_spans'], [alt_ac, alt_aln_method])
+            si = self._span_indexes[alt_ac, alt_aln_method] = SpanIndex((r["start_i"], r["end_i"], r) for r in rows)
+        return si
+
+    def load_span_index(self, alt_aln_method, alt_acs=None):
+        """loads the transcript spans for alt_aln_method (e.g., splign) on
+        alt_acs, or on all reference sequences if alt_acs is None, into
+        the in-memory index used by get_tx_for_region when span_index is
+        enabled; otherwise, the spans for each reference sequence are
+        loaded on first use.  Returns the number of spans loaded.
+        """
+        if alt_acs is None:
+            rows = self._fetchall(self._queries['tx_spans_all'], [alt_aln_method])
+        else:
+            rows = self._fetchall(self._queries['tx_spans_batch'], [_unique(alt_acs), alt_aln_method])
+        spans = {ac: [] for ac in (alt_acs or ())}
+        for r in rows:
+            spans.setdefault(r["alt_ac"], []).append((r["start_i"], r["end_i"], r))
+        for alt_ac, ac_spans in spans.items():
+            self._span_indexes[alt_ac, alt_aln_method] = SpanIndex(ac_spans)
+        return len(rows)
+
     def get_tx_identity_info(self, tx_ac):
         """returns features associated with a single transcript.
 
@@ -397,6 +572,20 @@ class UTABase(Interface):
             raise HGVSDataNotAvailableError("No transcript definition for (tx_ac={tx_ac})".format(tx_ac=tx_ac))
         return rows[0]
        
+    def get_tx_limits_batch(self, tx_acs):
+        """returns {tx_ac: get_tx_limits(tx_ac)} for a list of transcripts,
+        with one query, omitting transcripts that are not found, and primes
+        the get_tx_limits cache with the results
+        """
+        if self.mode == RUN:
+            return super(UTABase, self).get_tx_limits_batch(tx_acs)
+        results = {}
+        for row in self._fetchall(self._queries['tx_limits_batch'], [_unique(tx_acs)]):
+            if row["ac"] not in results:
+                results[row["ac"]] = row
+                self.prime_cache("get_tx_limits", (row["ac"], ), row)
+        return results
+
     def get_tx_info(self, tx_ac, alt_ac, alt_aln_method):
         """return a single transcript info for supplied accession (tx_ac, alt_ac, alt_aln_method), or None if not found
 
@@ -431,6 +620,22 @@ class UTABase(Interface):
                             "{tx_ac},alt_ac={alt_ac},alt_aln_method={alt_aln_method})".format(
                                 n=len(rows), tx_ac=tx_ac, alt_ac=alt_ac, alt_aln_method=alt_aln_method))
 
+    def get_tx_info_batch(self, tx_acs, alt_ac, alt_aln_method):
+        """returns {tx_ac: get_tx_info(tx_ac, alt_ac, alt_aln_method)} for a
+        list of transcripts, with one query, omitting transcripts that are
+        not found or have multiple records, and primes the get_tx_info cache
+        with the results
+        """
+        if self.mode == RUN:
+            return super(UTABase, self).get_tx_info_batch(tx_acs, alt_ac, alt_aln_method)
+        rows_by_tx_ac = {}
+        for row in self._fetchall(self._queries['tx_info_batch'], [_unique(tx_acs), alt_ac, alt_aln_method]):
+            rows_by_tx_ac.setdefault(row["tx_ac"], []).append(row)
+        results = {tx_ac: rows[0] for tx_ac, rows in rows_by_tx_ac.items() if len(rows) == 1}
+        for tx_ac, row in results.items():
+            self.prime_cache("get_tx_info", (tx_ac, alt_ac, alt_aln_method), row)
+        return results
+
     def get_tx_mapping_options(self, tx_ac):
         """Return all transcript alignment sets for a given transcript
         accession (tx_ac); returns empty list if transcript does not
@@ -460,6 +665,21 @@ class UTABase(Interface):
         rows = self._fetchall(self._queries['tx_mapping_options'], [tx_ac])
         return rows
 
+    def get_tx_mapping_options_batch(self, tx_acs):
+        """returns {tx_ac: get_tx_mapping_options(tx_ac)} for a list of
+        transcripts, with one query, and primes the get_tx_mapping_options
+        cache with the results
+        """
+        if self.mode == RUN:
+            return super(UTABase, self).get_tx_mapping_options_batch(tx_acs)
+        tx_acs = _unique(tx_acs)
+        results = {tx_ac: [] for tx_ac in tx_acs}
+        for row in self._fetchall(self._queries['tx_mapping_options_batch'], [tx_acs]):
+            results[row["tx_ac"]].append(row)
+        for tx_ac, rows in results.items():
+            self.prime_cache("get_tx_mapping_options", (tx_ac, ), rows)
+        return results
+
     def get_similar_transcripts(self, tx_ac):
         """Return a list of transcripts that are similar to the given
         transcript, with relevant similarity criteria.
@@ -515,21 +735,80 @@ class UTABase(Interface):
         return make_ac_name_map(assembly_name)
 
 
+class _UTAConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that records the statements prepared on it"""
+
+    def __init__(self, *args, **kwargs):
+        super(_UTAConnection, self).__init__(*args, **kwargs)
+        self.prepared = set()
+
+
+def _positional_params(sql):
+    """returns sql with psycopg2 %s placeholders replaced by PostgreSQL
+    $1, $2, ... parameters, for use in PREPARE"""
+    n = [0]
+
+    def repl(m):
+        if m.group(0) == "%%":
+            return "%"
+        n[0] += 1
+        return "${}".format(n[0])
+
+    return re.sub(r"%%|%s", repl, sql)
+
+
+def _set_search_path(conn, schema):
+    """sets the search_path of psycopg2 connection conn to schema
+
+    A SET statement, unlike the libpq options startup parameter, also
+    works through connection poolers such as pgbouncer, which reject
+    that parameter or ignore it (ignore_startup_parameters).
+    """
+    with conn.cursor() as cur:
+        cur.execute(psycopg2.sql.SQL("set search_path = {}").format(psycopg2.sql.Identifier(schema)))
+
+
+def _is_connection_error(e):
+    """returns True if e reports a failed or lost connection rather than
+    an error from the server, such as a canceled query
+    (QueryCanceledError) or a serialization failure
+    (TransactionRollbackError), which carry an SQLSTATE code"""
+    return isinstance(e, psycopg2.InterfaceError) or (isinstance(e, psycopg2.OperationalError) and e.pgcode is None)
+
+
 class UTA_postgresql(UTABase):
-    def __init__(self, url, pooling=vvhgvs.global_config.uta.pooling, application_name=None, mode=None, cache=None):
+    # queries that are PREPAREd once per connection when prepared_statements is True
+    _prepared_queries = (
+        "agg_exon_aln",
+        "tx_for_region",
+        "tx_info",
+        "tx_limits",
+        "tx_mapping_options",
+        "tx_seq_anno",
+    )
+
+    def __init__(self, url, pooling=vvhgvs.global_config.uta.pooling, application_name=None, mode=None, cache=None,
+                 prepared_statements=None, span_index=None, alias_index=None):
         if url.schema is None:
             raise Exception("No schema name provided in {url}".format(url=url))
         self.application_name = application_name
         self.pooling = pooling
+        if prepared_statements is None:
+            prepared_statements = vvhgvs.global_config.uta.prepared_statements
+        self.prepared_statements = prepared_statements
+        self._prepared_names = {self._queries[name]: "vvhgvs_" + name for name in self._prepared_queries}
         self._conn = None
-        super(UTA_postgresql, self).__init__(url, mode, cache)
+        self._conn_lock = threading.Lock()
+        self._pool = None
+        super(UTA_postgresql, self).__init__(url, mode, cache, span_index, alias_index)
 
     def __del__(self):
         self.close()
 
     def close(self):
         if self.pooling:
-            self._pool.closeall()
+            if self._pool is not None:
+                self._pool.closeall()
         else:
             if self._conn is not None:
                 self._conn.close()
@@ -540,24 +819,55 @@ class UTA_postgresql(UTABase):
             self.application_name = os.path.basename(st[-1][1])
         # fix for allowing '/' in host names (when actually UNIX socket files)
         host_or_socketfile = self.url.hostname.replace('%2F','/')
-        conn_args = dict(
+        self._conn_args = dict(
             host=host_or_socketfile,
             port=self.url.port,
             database=self.url.database,
             user=self.url.username,
             password=self.url.password,
             application_name=self.application_name + "/" + vvhgvs.__version__,
+            connection_factory=_UTAConnection,
         )
+        cfg = vvhgvs.global_config.uta
         if self.pooling:
-            _logger.info("Using UTA ThreadedConnectionPool")
-            self._pool = psycopg2.pool.ThreadedConnectionPool(vvhgvs.global_config.uta.pool_min,
-                                                              vvhgvs.global_config.uta.pool_max, **conn_args)
+            _logger.info("Using UTA ConnectionPool")
+            self._pool = ConnectionPool(self._new_connection, cfg.pool_min, cfg.pool_max,
+                                        timeout=cfg.pool_timeout or None, check_idle=cfg.pool_check_idle)
         else:
-            self._conn = psycopg2.connect(**conn_args)
-            self._conn.autocommit = True
+            self._conn = self._new_connection()
 
         self._ensure_schema_exists()
 
+    def _new_connection(self):
+        conn = psycopg2.connect(**self._conn_args)
+        # autocommit=True obviates closing explicitly
+        conn.autocommit = True
+        # set search_path once per connection rather than per cursor
+        _set_search_path(conn, self.url.schema)
+        return conn
+
+    def pool_stats(self):
+        """returns connection pool gauges and counters (see
+        ConnectionPool.stats), or None without pooling"""
+        return self._pool.stats() if self.pooling and self._pool is not None else None
+
+    def _execute(self, cur, sql, *args):
+        """executes sql on cur; with prepared_statements, the hot queries in
+        _prepared_queries are PREPAREd on first use on each connection and
+        then EXECUTEd with parameters, saving a parse and plan per call"""
+        name = self._prepared_names.get(sql) if self.prepared_statements else None
+        if name is None:
+            return cur.execute(sql, *args)
+        params = args[0] if args else []
+        prepared = cur.connection.prepared
+        if name not in prepared:
+            cur.execute("prepare {name} as {sql}".format(name=name, sql=_positional_params(sql)))
+            prepared.add(name)
+        if params:
+            cur.execute("execute {name} ({ph})".format(name=name, ph=", ".join(["%s"] * len(params))), params)
+        else:
+            cur.execute("execute {name}".format(name=name))
+
     def _ensure_schema_exists(self):
         # N.B. On AWS RDS, information_schema.schemata always returns zero rows
         r = self._fetchone("select exists(SELECT 1 FROM pg_namespace WHERE nspname = %s)", [self.url.schema])
@@ -566,11 +876,43 @@ class UTA_postgresql(UTABase):
         raise HGVSDataNotAvailableError("specified schema ({}) does not exist (url={})".format(
             self.url.schema, self.url))
 
+    def _fetchone(self, sql, *args):
+        return self._with_retries(super(UTA_postgresql, self)._fetchone, sql, *args)
+
+    def _fetchall(self, sql, *args):
+        return self._with_retries(super(UTA_postgresql, self)._fetchall, sql, *args)
+
+    def _with_retries(self, fn, *args):
+        """calls fn(*args), retrying after a connection failure with
+        exponential, jittered backoff ([uta] retries, retry_backoff_ms and
+        retry_backoff_max_ms) so that clients do not reconnect in lockstep"""
+        cfg = vvhgvs.global_config.uta
+        for attempt in range(cfg.retries + 1):
+            try:
+                return fn(*args)
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                if not _is_connection_error(e):
+                    raise
+                if attempt == cfg.retries:
+                    raise HGVSError("Permanently lost connection to {url} ({n} retries): {e}".format(
+                        url=self.url, n=cfg.retries, e=e))
+                backoff_ms = min(cfg.retry_backoff_max_ms, cfg.retry_backoff_ms * 2**attempt)
+                delay = backoff_ms * random.uniform(0.5, 1.0) / 1000
+                _logger.warning("Lost connection to {url} ({e}); retrying in {d:.2f}s".format(
+                    url=self.url, e=str(e).strip(), d=delay))
+                time.sleep(delay)
+
+    def _get_connection(self):
+        with self._conn_lock:
+            if self._conn is None or self._conn.closed:
+                self._conn = self._new_connection()
+            return self._conn
+
     @contextlib.contextmanager
-    def _get_cursor(self, n_retries=1):
+    def _get_cursor(self):
         """Returns a context manager for obtained from a single or pooled
-        connection, and sets the PostgreSQL search_path to the schema
-        specified in the connection URL.
+        connection.  The PostgreSQL search_path is set to the schema
+        specified in the connection URL when each connection is opened.
 
         Although *connections* are threadsafe, *cursors* are bound to
         connections and are *not* threadsafe. Do not share cursors
@@ -583,43 +925,168 @@ class UTA_postgresql(UTABase):
 
         Do not call this function outside a contextmanager.
 
-        """
+        A connection that fails is discarded (from the pool, if pooling)
+        and replaced on next use; _fetchone and _fetchall retry.
 
-        n_tries_rem = n_retries + 1
-        while n_tries_rem > 0:
+        """
+        conn = self._pool.getconn() if self.pooling else self._get_connection()
+        broken = False
+        try:
+            cur = conn.cursor(cursor_factory=RowCursor)
             try:
-
-                conn = self._pool.getconn() if self.pooling else self._conn
-
-                # autocommit=True obviates closing explicitly
-                conn.autocommit = True
-
-                cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-                cur.execute("set search_path = {self.url.schema};".format(self=self))
-
                 yield cur
+            finally:
+                if not conn.closed:
+                    cur.close()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            broken = bool(conn.closed) or _is_connection_error(e)
+            raise
+        finally:
+            if self.pooling:
+                self._pool.putconn(conn, broken=broken or bool(conn.closed))
+            elif broken and not conn.closed:
+                conn.close()
+
+
+def _sqlite_column_decoders(conn):
+    """returns a dict of column name -> function decoding the stored
+    value, for the json and boolean columns of the snapshot's tables"""
+    decoders = {"lengths": json.loads}    # json_array() in tx_identity_info
+    types = {}
+    tables = [r[0] for r in conn.execute("select name from sqlite_master where type = 'table'")]
+    for table in tables:
+        for column in conn.execute("PRAGMA table_info('{}')".format(table.replace("'", "''"))):
+            types.setdefault(column[1], set()).add(column[2].lower())
+    for name, decltypes in types.items():
+        if decltypes == {"json"}:
+            decoders[name] = json.loads
+        elif decltypes == {"boolean"}:
+            decoders[name] = bool
+    return decoders
+
+
+def _sqlite_row_factory(decoders):
+    """returns a sqlite3 row factory that decodes json and boolean
+    columns and returns Rows"""
+    layouts = {}    # cursor.description -> (Row class, [(index, decoder)])
+
+    def row_factory(cur, t):
+        desc = cur.description
+        layout = layouts.get(desc)
+        if layout is None:
+            names = [d[0] for d in desc]
+            layout = layouts[desc] = (row_class(names), [(i, decoders[n]) for i, n in enumerate(names)
+                                                         if n in decoders])
+        cls, decode = layout
+        if decode:
+            t = list(t)
+            for i, fn in decode:
+                if t[i] is not None:
+                    t[i] = fn(t[i])
+        return cls(t)
+
+    return row_factory
+
+
+class UTA_sqlite(UTABase):
+    """UTA data provider for a single-file SQLite snapshot of the UTA
+    tables and views used by UTABase, as written by
+    :mod:`vvhgvs.dataproviders.uta_export` (vvhgvs-uta-export).  Queries
+    are answered in-process.
+
+    The URL is sqlite:///relative/path or sqlite:////absolute/path.
+    Array columns are stored as JSON and returned as lists, and boolean
+    columns as integers returned as bools, as from PostgreSQL.
+
+    """
 
-                # contextmanager executes these when context exits
-                cur.close()
-                if self.pooling:
-                    self._pool.putconn(conn)
+    # PostgreSQL-specific queries are rewritten; list parameters are
+    # passed as JSON arrays, and placeholders are sqlite3's ?
+    _queries = dict(UTABase._queries, **{
+        "agg_exon_aln_batch": """
+            SELECT
+            alt_strand,mapped_start,not_quite_cigar,mapped_end,
+            cds_start_i, cds_end_i,
+            transcript_exon_start_end,mapped_exon_start_end
+            FROM json_each(%s) AS Q
+            LEFT JOIN full_tx_aln_w_nq_cigar_mv A
+            ON A.tx_ac=Q.value and A.alt_ac=%s and A.alt_aln_method=%s
+            ORDER BY Q.key
+            """,
+        "tx_limits_batch": """
+            SELECT ac, cds_start_i, cds_end_i, length, hgnc
+            FROM transcript_lengths_mv
+            WHERE ac IN (SELECT value FROM json_each(%s))
+            """,
+        "tx_identity_info": """
+            SELECT ac as tx_ac, NULL AS alt_ac, NULL AS alt_aln_method, cds_start_i, cds_end_i,
+            json_array(length) AS lengths, hgnc
+            FROM transcript_lengths_mv
+            WHERE ac=%s
+            """,
+        "tx_info_batch": """
+            select hgnc, cds_start_i, cds_end_i, tx_ac, alt_ac, alt_aln_method
+            from all_mapped_transcript_mv
+            where tx_ac IN (SELECT value FROM json_each(%s)) and alt_ac=%s and alt_aln_method=%s
+            """,
+        "tx_mapping_options_batch": """
+            select distinct tx_ac,alt_ac,alt_aln_method
+            from tx_exon_aln_mv where tx_ac IN (SELECT value FROM json_each(%s)) and cigar is not NULL
+            """,
+        "tx_spans_batch": """
+            select tx_ac,alt_ac,alt_strand,alt_aln_method,start_i,end_i
+            from current_valid_mapped_transcript_spans_mv
+            where alt_ac IN (SELECT value FROM json_each(%s)) and alt_aln_method=%s
+            """,
+    })
+    _queries = {name: sql.replace("%%", "%").replace("%s", "?") for name, sql in _queries.items()}
 
-                break
+    def __init__(self, url, mode=None, cache=None, span_index=None, alias_index=None):
+        self.application_name = None
+        self.path = url.path[1:]
+        self._local = threading.local()
+        self._row_factory = None
+        super(UTA_sqlite, self).__init__(url, mode, cache, span_index, alias_index)
 
-            except psycopg2.OperationalError:
+    def _connect(self):
+        if not os.path.exists(self.path):
+            raise HGVSDataNotAvailableError("{path} does not exist (url={url})".format(path=self.path, url=self.url))
+        self._get_conn()
+
+    def _get_conn(self):
+        # sqlite3 connections may not be shared between threads; open
+        # one per thread, read-only
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect("file:{}?mode=ro".format(self.path), uri=True)
+            if self._row_factory is None:
+                self._row_factory = _sqlite_row_factory(_sqlite_column_decoders(conn))
+            conn.row_factory = self._row_factory
+            conn.execute("PRAGMA case_sensitive_like = ON")    # as PostgreSQL LIKE
+            self._local.conn = conn
+        return conn
 
-                _logger.warning("Lost connection to {url}; attempting reconnect".format(url=self.url))
-                if self.pooling:
-                    self._pool.closeall()
-                self._connect()
-                _logger.warning("Reconnected to {url}".format(url=self.url))
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
 
-            n_tries_rem -= 1
+    @contextlib.contextmanager
+    def _get_cursor(self):
+        cur = self._get_conn().cursor()
+        try:
+            yield cur
+        finally:
+            cur.close()
 
-        else:
+    def _execute(self, cur, sql, *args):
+        params = [json.dumps(p) if isinstance(p, (list, tuple)) else p for p in args[0]] if args else []
+        cur.execute(sql, params)
 
-            # N.B. Probably never reached
-            raise HGVSError("Permanently lost connection to {url} ({n} retries)".format(url=self.url, n=n_retries))
+    def data_version(self):
+        row = self._fetchone("select value from meta where key = 'data_version'")
+        return row["value"] if row else os.path.basename(self.path)
 
 
 class ParseResult(urlparse.ParseResult):
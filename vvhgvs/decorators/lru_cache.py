@@ -13,13 +13,15 @@ Added persistence capability
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from functools import update_wrapper
 from threading import RLock
+from time import monotonic
 
 from ..exceptions import HGVSDataNotAvailableError, HGVSVerifyFailedError
 
 _CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+_CacheBytesInfo = namedtuple("CacheBytesInfo", ["maxbytes", "currbytes"])
 
 
 class _HashedSeq(list):
@@ -74,20 +76,47 @@ RUN = 2
 VERIFY = 3
 
 
-def lru_cache(maxsize=100, typed=False, mode=None, cache=None):
+def lru_cache(maxsize=100,
+              typed=False,
+              mode=None,
+              cache=None,
+              maxbytes=None,
+              sizeof=len,
+              negative_maxsize=0,
+              negative_ttl=300,
+              policy="lru"):
     """Least-recently-used cache decorator.
 
     If *maxsize* is set to None, the LRU features are disabled and the cache
     can grow without bound.
 
+    If *maxbytes* is set, the bounded cache additionally evicts least
+    recently used results while the sum of *sizeof* (default: len) over
+    cached results exceeds *maxbytes*.  Results larger than *maxbytes* are
+    not cached.
+
+    If *negative_maxsize* is greater than zero, up to that many calls that
+    raised HGVSDataNotAvailableError are remembered for *negative_ttl*
+    seconds; repeating such a call raises an exception of the same type
+    and message without calling the function again.  Negative results are
+    kept in memory only, regardless of *mode*.
+
+    If *policy* is "clock", the bounded cache approximates LRU with the
+    CLOCK (second chance) algorithm instead: a hit merely marks its entry
+    as referenced, so the hit path takes no lock and concurrent threads do
+    not serialize on hot cached methods.  Only misses take the lock.
+
     If *typed* is True, arguments of different types will be cached separately.
     For example, f(3.0) and f(3) will be treated as distinct calls with
     distinct results.
 
     Arguments to the cached function must be hashable.
 
-    View the cache statistics named tuple (hits, misses, maxsize, currsize) with
-    f.cache_info().  Clear the cache and statistics with f.cache_clear().
+    View the cache statistics named tuple (hits, misses, maxsize, currsize)
+    with f.cache_info(), and the byte budget and usage (maxbytes,
+    currbytes) with f.cache_bytes_info().  Clear the cache and statistics with f.cache_clear().
+    Store a result obtained elsewhere (e.g., from a batch query) with
+    f.cache_prime(args, result).
     Access the underlying function with f.__wrapped__.
 
     See:  http://en.wikipedia.org/wiki/Cache_algorithms#Least_Recently_Used
@@ -99,12 +128,12 @@ def lru_cache(maxsize=100, typed=False, mode=None, cache=None):
                 in the event of a miss, the novel query and results would be written to cache, then returned.
         RUN:    queries are executed against caches; misses result in DataNotLocallyAvailableError
         VERIFY: always execute the function; if persistent cache value and returned value are different, raise VerifyFailedError
-    :param cache: PersistentDict object or None;
+    :param cache: PersistentDict, JournaledDict or read-only MappedDict object or None;
 
     """
 
     # Users should only access the lru_cache through its public API:
-    #       cache_info, cache_clear, and f.__wrapped__
+    #       cache_info, cache_bytes_info, cache_clear, cache_prime, and f.__wrapped__
     # The internals of the lru_cache are encapsulated for thread safety and
     # to allow the implementation to change (including a possible C version).
 
@@ -113,25 +142,52 @@ def lru_cache(maxsize=100, typed=False, mode=None, cache=None):
 
         _cache = cache
         _maxsize = maxsize
+        _maxbytes = maxbytes
 
         if _cache is None:
             _cache = dict()
         elif mode is not None:
-            _maxsize = None
+            _maxsize = _maxbytes = None
 
-        stats = [0, 0]    # make statistics updateable non-locally
-        HITS, MISSES = 0, 1    # names for the stats fields
+        stats = [0, 0, 0]    # make statistics updateable non-locally
+        HITS, MISSES, BYTES = 0, 1, 2    # names for the stats fields
         make_key = _make_key
         cache_get = _cache.get    # bound method to lookup key or return None
         _len = len    # localize the global len() function
 
+        negative = OrderedDict()    # key -> (exception type, exception args, expiry time)
+
+        def call_user_function(key, args, kwds):
+            # call user_function, replaying and remembering HGVSDataNotAvailableErrors
+            if negative_maxsize:
+                with lock:
+                    entry = negative.get(key)
+                    if entry is not None and entry[2] <= monotonic():
+                        del negative[key]
+                        entry = None
+                if entry is not None:
+                    stats[HITS] += 1
+                    raise entry[0](*entry[1])
+            try:
+                return user_function(*args, **kwds)
+            except HGVSDataNotAvailableError as e:
+                if negative_maxsize:
+                    with lock:
+                        negative[key] = (type(e), e.args, monotonic() + negative_ttl)
+                        while len(negative) > negative_maxsize:
+                            negative.popitem(last=False)
+                raise
+
         root = []    # root of the circular doubly linked list
-        root[:] = [root, root, None, None]    # initialize by pointing to self
+        root[:] = [root, root, None, None, 0]    # initialize by pointing to self
         nonlocal_root = [root]    # make updateable non-locally
-        PREV, NEXT, KEY, RESULT = 0, 1, 2, 3    # names for the link fields
+        PREV, NEXT, KEY, RESULT, SIZE = 0, 1, 2, 3, 4    # names for the link fields
 
         if _maxsize == 0:
 
+            def store(key, result):
+                pass
+
             def wrapper(*args, **kwds):
                 # no caching, just do a statistics update after a successful call
                 result = user_function(*args, **kwds)
@@ -140,6 +196,15 @@ def lru_cache(maxsize=100, typed=False, mode=None, cache=None):
 
         elif _maxsize is None:
 
+            writable = hasattr(_cache, "__setitem__")    # False for a read-only MappedDict
+
+            def store(key, result):
+                if not writable or key in _cache:
+                    return
+                _cache[key] = result
+                if mode == LEARN:
+                    _cache.sync()
+
             def wrapper(*args, **kwds):
                 # simple caching without ordering or size limit
                 key = make_key(user_function.__name__, args, kwds, typed, ())
@@ -157,15 +222,110 @@ def lru_cache(maxsize=100, typed=False, mode=None, cache=None):
                     raise HGVSDataNotAvailableError('Data not available in local cache when calling ' +
                                                     user_function.__name__ + ' with args ' + str(args) +
                                                     ' and keywords ' + str(kwds))
-                result = user_function(*args, **kwds)
-                _cache[key] = result
-                if mode == LEARN:
-                    _cache.sync()
+                result = call_user_function(key, args, kwds)
+                store(key, result)
                 stats[MISSES] += 1
                 return result
 
+        elif policy == "clock":
+
+            # _cache maps key -> [result, referenced, size]; ring holds keys (or
+            # None for free slots) for the clock hand to sweep
+            ring = []
+            free_slots = []
+            hand = [0]
+            VALUE, REFERENCED, NBYTES = 0, 1, 2    # names for the entry fields
+
+            def evict():
+                while True:
+                    if hand[0] >= _len(ring):
+                        hand[0] = 0
+                    slot = hand[0]
+                    hand[0] += 1
+                    k = ring[slot]
+                    if k is None:
+                        continue
+                    entry = _cache[k]
+                    if entry[REFERENCED]:
+                        entry[REFERENCED] = False    # second chance
+                        continue
+                    del _cache[k]
+                    ring[slot] = None
+                    free_slots.append(slot)
+                    stats[BYTES] -= entry[NBYTES]
+                    return
+
+            def store(key, result):
+                # caller must hold lock
+                size = sizeof(result) if _maxbytes is not None else 0
+                if key in _cache or (_maxbytes is not None and size > _maxbytes):
+                    return
+                while _cache and (_len(_cache) >= _maxsize or
+                                  (_maxbytes is not None and stats[BYTES] + size > _maxbytes)):
+                    evict()
+                if free_slots:
+                    ring[free_slots.pop()] = key
+                else:
+                    ring.append(key)
+                _cache[key] = [result, False, size]
+                stats[BYTES] += size
+
+            def wrapper(*args, **kwds):
+                # size limited caching with lock-free hits
+                key = make_key(user_function.__name__, args, kwds, typed, ())
+                entry = cache_get(key)
+                if entry is not None:
+                    entry[REFERENCED] = True
+                    stats[HITS] += 1    # unlocked, so approximate under contention
+                    return entry[VALUE]
+                result = call_user_function(key, args, kwds)
+                with lock:
+                    store(key, result)
+                    stats[MISSES] += 1
+                return result
+
         else:
 
+            def store(key, result):
+                # caller must hold lock
+                size = sizeof(result) if _maxbytes is not None else 0
+                root, = nonlocal_root
+                if key in _cache:
+                    # getting here means that this same key was added to the
+                    # cache while the lock was released.  since the link
+                    # update is already done, we need only return the
+                    # computed result and update the count of misses.
+                    pass
+                elif _maxbytes is not None and size > _maxbytes:
+                    # too large to cache at all
+                    pass
+                elif _maxbytes is None and _len(_cache) >= _maxsize:
+                    # use the old root to store the new key and result
+                    oldroot = root
+                    oldroot[KEY] = key
+                    oldroot[RESULT] = result
+                    # empty the oldest link and make it the new root
+                    root = nonlocal_root[0] = oldroot[NEXT]
+                    oldkey = root[KEY]
+                    root[KEY] = root[RESULT] = None
+                    # now update the cache dictionary for the new links
+                    del _cache[oldkey]
+                    _cache[key] = oldroot
+                else:
+                    # evict oldest links until both the entry and byte budgets allow the new result
+                    while _cache and (_len(_cache) >= _maxsize or
+                                      (_maxbytes is not None and stats[BYTES] + size > _maxbytes)):
+                        oldest = root[NEXT]
+                        root[NEXT] = oldest[NEXT]
+                        oldest[NEXT][PREV] = root
+                        del _cache[oldest[KEY]]
+                        stats[BYTES] -= oldest[SIZE]
+                    # put result in a new link at the front of the list
+                    last = root[PREV]
+                    link = [last, root, key, result, size]
+                    last[NEXT] = root[PREV] = _cache[key] = link
+                    stats[BYTES] += size
+
             def wrapper(*args, **kwds):
                 # size limited caching that tracks accesses by recency
                 key = make_key(user_function.__name__, args, kwds, typed, ())
@@ -174,7 +334,7 @@ def lru_cache(maxsize=100, typed=False, mode=None, cache=None):
                     if link is not None:
                         # record recent use of the key by moving it to the front of the list
                         root, = nonlocal_root
-                        link_prev, link_next, key, result = link
+                        link_prev, link_next, key, result, _ = link
                         link_prev[NEXT] = link_next
                         link_next[PREV] = link_prev
                         last = root[PREV]
@@ -183,32 +343,9 @@ def lru_cache(maxsize=100, typed=False, mode=None, cache=None):
                         link[NEXT] = root
                         stats[HITS] += 1
                         return result
-                result = user_function(*args, **kwds)
+                result = call_user_function(key, args, kwds)
                 with lock:
-                    root, = nonlocal_root
-                    if key in _cache:
-                        # getting here means that this same key was added to the
-                        # cache while the lock was released.  since the link
-                        # update is already done, we need only return the
-                        # computed result and update the count of misses.
-                        pass
-                    elif _len(_cache) >= _maxsize:
-                        # use the old root to store the new key and result
-                        oldroot = root
-                        oldroot[KEY] = key
-                        oldroot[RESULT] = result
-                        # empty the oldest link and make it the new root
-                        root = nonlocal_root[0] = oldroot[NEXT]
-                        oldkey = root[KEY]
-                        root[KEY] = root[RESULT] = None
-                        # now update the cache dictionary for the new links
-                        del _cache[oldkey]
-                        _cache[key] = oldroot
-                    else:
-                        # put result in a new link at the front of the list
-                        last = root[PREV]
-                        link = [last, root, key, result]
-                        last[NEXT] = root[PREV] = _cache[key] = link
+                    store(key, result)
                     stats[MISSES] += 1
                 return result
 
@@ -217,17 +354,39 @@ def lru_cache(maxsize=100, typed=False, mode=None, cache=None):
             with lock:
                 return _CacheInfo(stats[HITS], stats[MISSES], _maxsize, len(_cache))
 
+        def cache_bytes_info():
+            """Report the byte budget and the bytes of cached results"""
+            with lock:
+                return _CacheBytesInfo(_maxbytes, stats[BYTES])
+
+        def cache_prime(args, result, kwds=None):
+            """Store result as the result of calling the function with args
+            (and kwds), unless a result is already cached"""
+            if mode in (RUN, VERIFY):
+                return
+            key = make_key(user_function.__name__, tuple(args), kwds or {}, typed, ())
+            with lock:
+                negative.pop(key, None)
+                store(key, result)
+
         def cache_clear():
             """Clear the cache and cache statistics"""
             with lock:
                 _cache.clear()
+                negative.clear()
+                if policy == "clock" and _maxsize:
+                    ring[:] = []
+                    free_slots[:] = []
+                    hand[0] = 0
                 root = nonlocal_root[0]
-                root[:] = [root, root, None, None]
-                stats[:] = [0, 0]
+                root[:] = [root, root, None, None, 0]
+                stats[:] = [0, 0, 0]
 
         wrapper.__wrapped__ = user_function
         wrapper.cache_info = cache_info
+        wrapper.cache_bytes_info = cache_bytes_info
         wrapper.cache_clear = cache_clear
+        wrapper.cache_prime = cache_prime
         return update_wrapper(wrapper, user_function)
 
     return decorating_function
@@ -49,6 +49,20 @@ class HGVSVerifyFailedError(HGVSError):
     pass
 
 
+class HGVSDataPending(Exception):
+    """Raised by asynchronous data providers when a synchronous method
+    needs data that has not been fetched yet; `key` identifies the fetch.
+    Callers await the provider's resolve(exc) and retry.
+
+    Deliberately not an HGVSError, so that code handling HGVSError does
+    not swallow it.
+    """
+
+    def __init__(self, key):
+        super(HGVSDataPending, self).__init__(key)
+        self.key = key
+
+
 # <LICENSE>
 # Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
 #
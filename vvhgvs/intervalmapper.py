@@ -46,6 +46,7 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 import logging
 import re
+from bisect import bisect_left, bisect_right
 
 from vvhgvs.exceptions import HGVSInvalidIntervalError
 from six.moves import range
@@ -93,8 +94,13 @@ class IntervalPair(object):
 
 class IntervalMapper(object):
     """Provides mapping between sequence coordinates according to an
-    ordered set of IntervalPairs."""
-    __slots__ = ("interval_pairs", "ref_intervals", "tgt_intervals", "ref_len", "tgt_len")
+    ordered set of IntervalPairs.
+
+    Because intervals are adjacent, their starts and ends are each
+    non-decreasing; these are kept as arrays so that the intervals
+    containing a position are found by binary search."""
+    __slots__ = ("interval_pairs", "ref_intervals", "tgt_intervals", "ref_len", "tgt_len", "ref_starts", "ref_ends",
+                 "tgt_starts", "tgt_ends")
 
     def __init__(self, interval_pairs):
         """
@@ -117,6 +123,10 @@ class IntervalMapper(object):
         _validate_intervals(self.tgt_intervals)
         self.ref_len = sum([iv.len for iv in self.ref_intervals])
         self.tgt_len = sum([iv.len for iv in self.tgt_intervals])
+        self.ref_starts = [iv.start_i for iv in self.ref_intervals]
+        self.ref_ends = [iv.end_i for iv in self.ref_intervals]
+        self.tgt_starts = [iv.start_i for iv in self.tgt_intervals]
+        self.tgt_ends = [iv.end_i for iv in self.tgt_intervals]
 
     @staticmethod
     def from_cigar(cigar):
@@ -127,38 +137,53 @@ class IntervalMapper(object):
         """
         return IntervalMapper(cigar_to_intervalpairs(cigar))
 
+    @staticmethod
+    def from_compiled_alignment(aln):
+        """
+        :param aln: a compiled alignment
+        :type aln: :class:`vvhgvs.compiledalignment.CompiledAlignment`
+        :returns: an IntervalMapper instance for the alignment, without reparsing its CIGAR string
+        """
+        ref_pos = aln.ref_pos.tolist()
+        tgt_pos = aln.tgt_pos.tolist()
+        return IntervalMapper([
+            IntervalPair(Interval(ref_pos[i], ref_pos[i + 1]), Interval(tgt_pos[i], tgt_pos[i + 1]))
+            for i in range(len(aln.ops))
+        ])
+
     def map_ref_to_tgt(self, start_i, end_i, max_extent=False):
-        return self._map(self.ref_intervals, self.tgt_intervals, start_i, end_i, max_extent)
+        return self._map(self.ref_starts, self.ref_ends, self.tgt_starts, self.tgt_ends, start_i, end_i, max_extent)
 
     def map_tgt_to_ref(self, start_i, end_i, max_extent=False):
-        return self._map(self.tgt_intervals, self.ref_intervals, start_i, end_i, max_extent)
+        return self._map(self.tgt_starts, self.tgt_ends, self.ref_starts, self.ref_ends, start_i, end_i, max_extent)
 
     @staticmethod
-    def _map(from_ivs, to_ivs, from_start_i, from_end_i, max_extent):
-        def iv_map(from_ivs, to_ivs, from_start_i, from_end_i, max_extent):
+    def _map(from_starts, from_ends, to_starts, to_ends, from_start_i, from_end_i, max_extent):
+        def iv_map(from_starts, from_ends, from_start_i, from_end_i, max_extent):
             """returns the <start,end> intervals indexes in which from_start_i and from_end_i occur"""
-            # first look for 0-width interval that matches
-            seil = [i for i, iv in enumerate(from_ivs) if iv.start_i == from_start_i and iv.end_i == from_end_i]
-            if len(seil) > 0:
-                si = ei = seil[0]
-            else:
-                sil = [i for i, iv in enumerate(from_ivs) if iv.start_i <= from_start_i <= iv.end_i]
-                eil = [i for i, iv in enumerate(from_ivs) if iv.start_i <= from_end_i <= iv.end_i]
-                if len(sil) == 0 or len(eil) == 0:
-                    raise HGVSInvalidIntervalError("start or end or both are beyond the bounds of transcript record")
-                si, ei = (sil[0], eil[-1]) if max_extent else (sil[-1], eil[0])
-            return si, ei
-
-        def clip_to_iv(iv, pos):
-            return max(iv.start_i, min(iv.end_i, pos))
+            # first look for 0-width interval that matches: among the
+            # intervals starting at from_start_i, the first ending at from_end_i
+            lo = bisect_left(from_starts, from_start_i)
+            hi = bisect_right(from_starts, from_start_i, lo)
+            i = bisect_left(from_ends, from_end_i, lo, hi)
+            if i < hi and from_ends[i] == from_end_i:
+                return i, i
+            # intervals containing a position p (start_i <= p <= end_i) are
+            # those from the first ending at or after p to the last starting
+            # at or before it
+            s_first, s_last = bisect_left(from_ends, from_start_i), bisect_right(from_starts, from_start_i) - 1
+            e_first, e_last = bisect_left(from_ends, from_end_i), bisect_right(from_starts, from_end_i) - 1
+            if s_first > s_last or e_first > e_last:
+                raise HGVSInvalidIntervalError("start or end or both are beyond the bounds of transcript record")
+            return (s_first, e_last) if max_extent else (s_last, e_first)
+
+        def clip_to_iv(i, pos):
+            return max(to_starts[i], min(to_ends[i], pos))
 
         assert from_start_i <= from_end_i, "expected from_start_i <= from_end_i"
-        try:
-            si, ei = iv_map(from_ivs, to_ivs, from_start_i, from_end_i, max_extent)
-        except ValueError:
-            raise HGVSInvalidIntervalError("start_i,end_i interval out of bounds")
-        to_start_i = clip_to_iv(to_ivs[si], to_ivs[si].start_i + (from_start_i - from_ivs[si].start_i))
-        to_end_i = clip_to_iv(to_ivs[ei], to_ivs[ei].end_i - (from_ivs[ei].end_i - from_end_i))
+        si, ei = iv_map(from_starts, from_ends, from_start_i, from_end_i, max_extent)
+        to_start_i = clip_to_iv(si, to_starts[si] + (from_start_i - from_starts[si]))
+        to_end_i = clip_to_iv(ei, to_ends[ei] - (from_ends[ei] - from_end_i))
         return to_start_i, to_end_i
 
 
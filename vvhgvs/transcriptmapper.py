@@ -13,6 +13,7 @@ from bioutils.coordinates import strand_int_to_pm
 import vvhgvs.intervalmapper
 import vvhgvs.location
 
+from vvhgvs.compiledalignment import get_compiled_alignment
 from vvhgvs.exceptions import HGVSError, HGVSUsageError, HGVSDataNotAvailableError
 from vvhgvs.utils import build_tx_cigar
 from vvhgvs.enums import Datum
@@ -43,8 +44,8 @@ class TranscriptMapper(object):
         if self.alt_aln_method != "transcript":
             #tx_exons = hdp.get_tx_exons(self.tx_ac, self.alt_ac, self.alt_aln_method)
             # now pre filtered, exons must be adjacent within transcript
-            tx_exons = hdp.get_agg_exon_aln(self.tx_ac, self.alt_ac, self.alt_aln_method)
-            if tx_exons is None:
+            aln = get_compiled_alignment(hdp, self.tx_ac, self.alt_ac, self.alt_aln_method)
+            if aln is None:
                 tx_info = hdp.get_tx_limits(self.tx_ac)
                 if tx_info is None:
                     raise HGVSDataNotAvailableError(
@@ -57,12 +58,12 @@ class TranscriptMapper(object):
                     "alt_aln_method={self.alt_aln_method}): "
                     "No transcript exons".format(self=self)
                     )
-            self.strand = tx_exons["alt_strand"]
-            self.cds_start_i = tx_exons["cds_start_i"]
-            self.cds_end_i = tx_exons["cds_end_i"]
-            self.gc_offset = tx_exons["mapped_start"]
-            self.cigar = tx_exons['not_quite_cigar']
-            self.im = vvhgvs.intervalmapper.IntervalMapper.from_cigar(self.cigar)
+            self.strand = aln.strand
+            self.cds_start_i = aln.cds_start_i
+            self.cds_end_i = aln.cds_end_i
+            self.gc_offset = aln.gc_offset
+            self.cigar = aln.cigar
+            self.im = vvhgvs.intervalmapper.IntervalMapper.from_compiled_alignment(aln)
             self.tgt_len = self.im.tgt_len
         else:
             # this covers the identity cases n <-> c
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import logging
+import os
+import pickle
+import struct
+import zlib
+
+_logger = logging.getLogger(__name__)
+
+# each journal record is a (length, crc32) header followed by a pickled (key, value) pair
+_header = struct.Struct(">II")
+
+
+class JournaledDict(dict):
+    ''' Persistent dictionary backed by a snapshot and an append-only journal
+
+    The snapshot at `filename` has the same format as PersistentDict, so
+    existing cache files may be opened directly.  Entries added since the
+    last snapshot are appended to `filename + ".journal"` by sync(), which
+    therefore costs time proportional to the number of new entries rather
+    than to the size of the dictionary.  The journal is folded into the
+    snapshot once it outgrows both `compact_min_size` bytes and
+    `compact_ratio` times the snapshot size, and when the dictionary is
+    closed.
+
+    Records are checksummed; a torn or corrupt tail (e.g., after a crash
+    during a write) is discarded when the journal is replayed.
+    '''
+
+    def __init__(self, filename, flag='c', compact_ratio=1.0, compact_min_size=1 << 20, *args, **kwds):
+        self.filename = filename
+        self.journal_filename = filename + ".journal"
+        self.flag = flag    # r=readonly, c=create,write,read
+        self.compact_ratio = compact_ratio
+        self.compact_min_size = compact_min_size
+        self._pending = []
+        self._needs_compaction = False
+        self._journal = None
+        self._snapshot_size = 0
+        self._journal_size = 0
+        try:
+            with open(self.filename, 'rb') as f:
+                dict.update(self, pickle.load(f))
+            self._snapshot_size = os.path.getsize(self.filename)
+        except IOError:
+            if self.flag == 'r' and not os.path.exists(self.journal_filename):
+                raise IOError('Cannot open file ' + self.filename)
+        self._replay_journal()
+        dict.__init__(self, *args, **kwds)
+
+    def _replay_journal(self):
+        try:
+            with open(self.journal_filename, 'rb') as f:
+                data = f.read()
+        except IOError:
+            return
+        pos = 0
+        n_records = 0
+        while pos + _header.size <= len(data):
+            length, crc = _header.unpack_from(data, pos)
+            payload = data[pos + _header.size:pos + _header.size + length]
+            if len(payload) != length or zlib.crc32(payload) & 0xffffffff != crc:
+                break
+            key, value = pickle.loads(payload)
+            dict.__setitem__(self, key, value)
+            pos += _header.size + length
+            n_records += 1
+        if pos != len(data):
+            _logger.warning("Discarding {n} bytes of incomplete journal records from {fn}".format(
+                n=len(data) - pos, fn=self.journal_filename))
+            if self.flag != 'r':
+                with open(self.journal_filename, 'r+b') as f:
+                    f.truncate(pos)
+        self._journal_size = pos
+        _logger.debug("Replayed {n} records from {fn}".format(n=n_records, fn=self.journal_filename))
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self._pending.append(key)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._needs_compaction = True
+
+    def update(self, *args, **kwds):
+        for key, value in dict(*args, **kwds).items():
+            self[key] = value
+
+    def clear(self):
+        dict.clear(self)
+        self._pending = []
+        self._needs_compaction = True
+
+    def sync(self):
+        if self.flag == 'r':
+            return
+        if self._needs_compaction:
+            self.compact()
+            return
+        if not self._pending:
+            return
+        if self._journal is None:
+            self._journal = open(self.journal_filename, 'ab')
+        for key in self._pending:
+            if key not in self:
+                continue
+            payload = pickle.dumps((key, dict.__getitem__(self, key)), -1)
+            self._journal.write(_header.pack(len(payload), zlib.crc32(payload) & 0xffffffff))
+            self._journal.write(payload)
+            self._journal_size += _header.size + len(payload)
+        self._journal.flush()
+        self._pending = []
+        if self._journal_size > max(self.compact_min_size, self.compact_ratio * self._snapshot_size):
+            self.compact()
+
+    def compact(self):
+        """write a new snapshot containing all entries and truncate the journal"""
+        if self.flag == 'r':
+            return
+        tmp_filename = self.filename + ".tmp"
+        with open(tmp_filename, 'wb') as f:
+            pickle.dump(dict(self), f, -1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_filename, self.filename)
+        # A crash before the journal is truncated merely replays
+        # records already contained in the new snapshot
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        with open(self.journal_filename, 'wb'):
+            pass
+        self._snapshot_size = os.path.getsize(self.filename)
+        self._journal_size = 0
+        self._pending = []
+        self._needs_compaction = False
+
+    def close(self):
+        self.sync()
+        if self.flag != 'r' and self._journal_size > 0:
+            self.compact()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# <LICENSE>
+# Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# </LICENSE>
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""Read-only, memory-mapped dictionary for run mode caches
+
+A MappedDict file is an open-addressing hash table of (digest, offset)
+slots followed by length-prefixed pickled (key, value) records.  Lookups
+hash the key, probe the table in place and unpickle only the matching
+record, so opening a cache is instantaneous regardless of its size, and
+processes that open the same file share its pages through the OS page
+cache.
+
+Convert an existing learn-mode cache with::
+
+    python -m vvhgvs.utils.MappedDict cache.hdp cache.mhdp
+
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+
+_magic = b"VVHGVSMD"
+_file_header = struct.Struct(">8sIIQ")    # magic, format version, n_slots, n_items
+_slot = struct.Struct(">QQ")    # key digest, record offset (0 = empty)
+_record_header = struct.Struct(">I")    # pickled record length
+_format_version = 1
+
+
+def _key_digest(key):
+    """returns a 64-bit digest of key that, unlike hash(), is stable across processes"""
+    if isinstance(key, list):
+        key = tuple(key)
+    return struct.unpack(">Q", hashlib.blake2b(repr(key).encode("utf-8"), digest_size=8).digest())[0]
+
+
+class MappedDict(object):
+    ''' Read-only dictionary served from a memory-mapped hash table file
+    '''
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.flag = 'r'
+        with open(self.filename, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._n_slots, self._n_items = _file_header.unpack_from(self._mm, 0)
+        if magic != _magic or version != _format_version:
+            raise IOError("{fn} is not a MappedDict (version {v}) file".format(fn=self.filename, v=_format_version))
+        self._mask = self._n_slots - 1
+
+    @staticmethod
+    def is_mapped(filename):
+        """returns True if filename exists and is a MappedDict file"""
+        try:
+            with open(filename, 'rb') as f:
+                return f.read(len(_magic)) == _magic
+        except IOError:
+            return False
+
+    @staticmethod
+    def create(filename, mapping):
+        """write the contents of mapping to filename in MappedDict format"""
+        items = list(mapping.items())
+        n_slots = 1
+        while n_slots < 2 * len(items):
+            n_slots <<= 1
+        slots = [(0, 0)] * n_slots
+        offset = _file_header.size + n_slots * _slot.size
+        records = []
+        for key, value in items:
+            digest = _key_digest(key)
+            i = digest & (n_slots - 1)
+            while slots[i][1] != 0:
+                i = (i + 1) & (n_slots - 1)
+            slots[i] = (digest, offset)
+            payload = pickle.dumps((key, value), -1)
+            records.append(_record_header.pack(len(payload)) + payload)
+            offset += _record_header.size + len(payload)
+
+        tmp_filename = filename + ".tmp"
+        with open(tmp_filename, 'wb') as f:
+            f.write(_file_header.pack(_magic, _format_version, n_slots, len(items)))
+            for slot in slots:
+                f.write(_slot.pack(*slot))
+            for record in records:
+                f.write(record)
+        os.replace(tmp_filename, filename)
+
+    def _records(self):
+        for i in range(self._n_slots):
+            _, offset = _slot.unpack_from(self._mm, _file_header.size + i * _slot.size)
+            if offset != 0:
+                yield self._read_record(offset)
+
+    def _read_record(self, offset):
+        length, = _record_header.unpack_from(self._mm, offset)
+        start = offset + _record_header.size
+        return pickle.loads(self._mm[start:start + length])
+
+    def get(self, key, default=None):
+        digest = _key_digest(key)
+        i = digest & self._mask
+        while True:
+            slot_digest, offset = _slot.unpack_from(self._mm, _file_header.size + i * _slot.size)
+            if offset == 0:
+                return default
+            if slot_digest == digest:
+                rec_key, value = self._read_record(offset)
+                if rec_key == key:
+                    return value
+            i = (i + 1) & self._mask
+
+    def __getitem__(self, key):
+        sentinel = self._mm
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        sentinel = self._mm
+        return self.get(key, sentinel) is not sentinel
+
+    def __len__(self):
+        return self._n_items
+
+    def __iter__(self):
+        for key, _ in self._records():
+            yield key
+
+    def keys(self):
+        return list(iter(self))
+
+    def items(self):
+        return list(self._records())
+
+    def clear(self):
+        # the mapped file is immutable; there is nothing to clear
+        pass
+
+    def sync(self):
+        pass
+
+    def close(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == "__main__":
+    import sys
+    from vvhgvs.utils.JournaledDict import JournaledDict
+
+    src_fn, dst_fn = sys.argv[1:3]
+    MappedDict.create(dst_fn, JournaledDict(src_fn, flag='r'))
+
+# <LICENSE>
+# Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# </LICENSE>
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""static in-memory index of spans for overlap queries
+
+Spans are sorted by start, and each position also records the largest
+end of any span up to it.  Both arrays are non-decreasing, so an
+overlap query is two bisections followed by a scan of the candidates
+between them.
+
+>>> si = SpanIndex([(10, 20, "a"), (15, 40, "b"), (30, 35, "c")])
+>>> si.overlapping(18, 32)
+['a', 'b', 'c']
+>>> si.overlapping(36, 50)
+['b']
+>>> si.overlapping(40, 50)
+['b']
+>>> si.overlapping(41, 50)
+[]
+
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from bisect import bisect_left
+
+
+class SpanIndex(object):
+    """index of (start, end, value) spans; overlapping(start, end)
+    returns the values of spans with span_start < end and start <= span_end,
+    in order of span start (the semantics of the get_tx_for_region query)"""
+
+    __slots__ = ("_starts", "_ends", "_max_ends", "_values")
+
+    def __init__(self, spans):
+        spans = sorted(spans, key=lambda s: (s[0], s[1]))
+        self._starts = [s[0] for s in spans]
+        self._ends = [s[1] for s in spans]
+        self._values = [s[2] for s in spans]
+        self._max_ends = []
+        max_end = None
+        for end in self._ends:
+            if max_end is None or end > max_end:
+                max_end = end
+            self._max_ends.append(max_end)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def overlapping(self, start, end):
+        hi = bisect_left(self._starts, end)    # spans that start before end
+        lo = bisect_left(self._max_ends, start, 0, hi)    # no span before lo reaches start
+        ends = self._ends
+        values = self._values
+        return [values[i] for i in range(lo, hi) if ends[i] >= start]
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
+
+# <LICENSE>
+# Copyright 2018 HGVS Contributors (https://github.com/biocommons/hgvs)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# </LICENSE>
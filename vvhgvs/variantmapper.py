@@ -8,6 +8,9 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 import copy
 import logging
+import threading
+import weakref
+from collections import OrderedDict
 
 from bioutils.sequences import reverse_complement
 
@@ -23,13 +26,61 @@ import vvhgvs.sequencevariant
 import vvhgvs.validator
 import vvhgvs.transcriptmapper
 
-from vvhgvs.exceptions import HGVSUnsupportedOperationError, HGVSInvalidVariantError
+from vvhgvs.exceptions import HGVSError, HGVSUnsupportedOperationError, HGVSInvalidVariantError
 from vvhgvs.decorators.lru_cache import lru_cache
 from vvhgvs.enums import PrevalidationLevel
 from vvhgvs.utils.reftranscriptdata import RefTranscriptData
 
 _logger = logging.getLogger(__name__)
 
+# data provider -> cached mapper constructor; see _alignment_mapper_cache
+_alignment_mapper_caches = weakref.WeakKeyDictionary()
+_alignment_mapper_caches_lock = threading.Lock()
+
+
+def _alignment_mapper_cache(hdp):
+    """returns the lru_cache'd function that constructs alignment
+    mappers for hdp, or None if hdp cannot be weakly referenced
+
+    There is one cache per data provider, shared by every VariantMapper
+    (including those created by normalizers, validators and fill_ref)
+    that uses it, and bounded by [lru_cache] alignment_mapper_maxsize.
+    Cached mappers refer to the provider through a weak proxy, so the
+    provider and its cache are freed together.
+    """
+    try:
+        return _alignment_mapper_caches[hdp]
+    except KeyError:
+        pass
+    except TypeError:    # not weakly referenceable or not hashable
+        return None
+    with _alignment_mapper_caches_lock:
+        cache = _alignment_mapper_caches.get(hdp)
+        if cache is None:
+            cache = _alignment_mapper_caches[hdp] = _make_alignment_mapper_cache(weakref.proxy(hdp))
+    return cache
+
+
+def _make_alignment_mapper_cache(hdp):
+    cfg = vvhgvs.global_config.lru_cache
+
+    @lru_cache(maxsize=cfg.alignment_mapper_maxsize, policy=cfg.provider_policy)
+    def get_alignment_mapper(tx_ac, alt_ac, alt_aln_method):
+        # Following uses TranscriptMapper as in vvhgvs v1.1.3
+        return vvhgvs.transcriptmapper.TranscriptMapper(hdp, tx_ac=tx_ac, alt_ac=alt_ac, alt_aln_method=alt_aln_method)
+
+    return get_alignment_mapper
+
+
+def alignment_mapper_cache_info(hdp):
+    """returns the statistics (CacheInfo) of the alignment mapper cache
+    shared by the VariantMappers that use hdp, or None if there is none"""
+    try:
+        cache = _alignment_mapper_caches.get(hdp)
+    except TypeError:
+        return None
+    return None if cache is None else cache.cache_info()
+
 
 class VariantMapper(object):
     r"""Maps SequenceVariant objects between g., n., r., c., and p. representations.
@@ -92,6 +143,50 @@ class VariantMapper(object):
         else:
             self._validator = vvhgvs.validator.Validator(self.hdp, strict=False)
 
+    # ############################################################################
+    # asynchronous mapping
+    # With an asynchronous data provider (e.g.,
+    # vvhgvs.dataproviders.async_uta.AsyncUTA), the mapping methods raise
+    # HGVSDataPending for data that have not been fetched.  These
+    # coroutines run the synchronous method with hdp.call, which awaits
+    # each fetch and reruns the method until it completes.  Each missing
+    # datum costs a rerun (see the async_uta module documentation).  With
+    # a synchronous data provider, the method is simply called, blocking
+    # the event loop while it runs.
+
+    async def _run_async(self, fn, *args, **kwargs):
+        call = getattr(self.hdp, "call", None)
+        if call is None:
+            return fn(*args, **kwargs)
+        return await call(fn, *args, **kwargs)
+
+    async def g_to_t_async(self, *args, **kwargs):
+        return await self._run_async(self.g_to_t, *args, **kwargs)
+
+    async def t_to_g_async(self, *args, **kwargs):
+        return await self._run_async(self.t_to_g, *args, **kwargs)
+
+    async def g_to_n_async(self, *args, **kwargs):
+        return await self._run_async(self.g_to_n, *args, **kwargs)
+
+    async def n_to_g_async(self, *args, **kwargs):
+        return await self._run_async(self.n_to_g, *args, **kwargs)
+
+    async def g_to_c_async(self, *args, **kwargs):
+        return await self._run_async(self.g_to_c, *args, **kwargs)
+
+    async def c_to_g_async(self, *args, **kwargs):
+        return await self._run_async(self.c_to_g, *args, **kwargs)
+
+    async def c_to_n_async(self, *args, **kwargs):
+        return await self._run_async(self.c_to_n, *args, **kwargs)
+
+    async def n_to_c_async(self, *args, **kwargs):
+        return await self._run_async(self.n_to_c, *args, **kwargs)
+
+    async def c_to_p_async(self, *args, **kwargs):
+        return await self._run_async(self.c_to_p, *args, **kwargs)
+
     # ############################################################################
     # g⟷t
     def g_to_t(self, var_g, tx_ac, alt_aln_method=vvhgvs.global_config.mapping.alt_aln_method):
@@ -425,14 +520,30 @@ class VariantMapper(object):
 
         return var
 
-    @lru_cache(maxsize=vvhgvs.global_config.lru_cache.maxsize)
+    def prefetch_region(self, alt_ac, start, end, alt_aln_method=vvhgvs.global_config.mapping.alt_aln_method):
+        """prefetches provider data for the transcripts that overlap start..end
+        of alt_ac (see Interface.prefetch_region) and builds their
+        alignment mappers; returns the accessions of those transcripts"""
+        rows = self.hdp.prefetch_region(alt_ac, start, end, alt_aln_method)
+        tx_acs = list(OrderedDict.fromkeys(r["tx_ac"] for r in rows))
+        for tx_ac in tx_acs:
+            try:
+                self._fetch_AlignmentMapper(tx_ac=tx_ac, alt_ac=alt_ac, alt_aln_method=alt_aln_method)
+            except HGVSError:
+                pass    # mapping with this transcript will raise as usual
+        return tx_acs
+
     def _fetch_AlignmentMapper(self, tx_ac, alt_ac, alt_aln_method):
         """
-        Get a new AlignmentMapper for the given transcript accession (ac),
-        possibly caching the result.
+        Get the AlignmentMapper for the given transcript accession (ac),
+        from a cache shared by all VariantMappers that use the same data
+        provider (see alignment_mapper_cache_info).
         """
-        # Following uses TranscriptMapper as in vvhgvs v1.1.3
-        return vvhgvs.transcriptmapper.TranscriptMapper(self.hdp, tx_ac=tx_ac, alt_ac=alt_ac, alt_aln_method=alt_aln_method)
+        cache = _alignment_mapper_cache(self.hdp)
+        if cache is None:
+            return vvhgvs.transcriptmapper.TranscriptMapper(self.hdp, tx_ac=tx_ac, alt_ac=alt_ac,
+                                                            alt_aln_method=alt_aln_method)
+        return cache(tx_ac, alt_ac, alt_aln_method)
 
     @staticmethod
     def _convert_edit_check_strand(strand, edit_in):